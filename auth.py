@@ -1,10 +1,14 @@
+import logging
 from fastapi import HTTPException
 from config import supabase
 
+logger = logging.getLogger(__name__)
+
 def login_user(email: str, password: str):
     try:
         response = supabase.auth.sign_in_with_password({"email": email, "password": password})
         if response.user and response.session:
+            logger.info("User logged in", extra={"user_id": response.user.id})
             return {
                 "success": True,
                 "access_token": response.session.access_token,
@@ -19,6 +23,7 @@ def signup_user(email: str, password: str):
     try:
         response = supabase.auth.sign_up({"email": email, "password": password})
         if response.user:
+            logger.info("User signed up", extra={"user_id": response.user.id})
             return {"success": True, "message": "Check email for verification"}
         else:
             raise HTTPException(status_code=400, detail="Signup failed")
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Benchmarks for the response path and the server
+Compares FastAPI's default encoding (jsonable_encoder + stdlib json) with the
+orjson-backed FastJSONResponse on payloads shaped like our real endpoints.
+
+HTTP mode measures throughput of a running server, e.g. to compare run.py modes:
+    python benchmark.py http "http://127.0.0.1:8003/api/current-session?user_id=...&access_token=..." 64 5000
+"""
+
+import asyncio
+import json
+import random
+import sys
+import time
+import gzip
+from datetime import datetime, timedelta
+
+from fastapi.encoders import jsonable_encoder
+
+from responses import dump_json, brotli
+
+USER_ID = "123e4567-e89b-12d3-a456-426614174000"
+EXERCISES = ["Bench Press", "Squat", "Deadlift", "Overhead Press", "Barbell Row", "Pull Up", "Lat Pulldown", "Leg Press"]
+
+def build_all_sessions_payload(session_count: int = 1000):
+    """Shape of /api/all-sessions for a user with a long history"""
+    start = datetime(2024, 1, 1, 18, 0)
+    sessions = []
+    for i in range(session_count):
+        created_at = start + timedelta(days=i)
+        sessions.append({
+            "id": i + 1,
+            "user_id": USER_ID,
+            "name": f"Workout {created_at.strftime('%b %d, %Y at %I:%M %p')}",
+            "created_at": created_at.isoformat(),
+            "set_count": random.randint(5, 35),
+        })
+    return {"success": True, "data": sessions}
+
+def build_session_sets_payload(set_count: int = 300):
+    """Shape of /api/session-sets for a long session"""
+    start = datetime(2025, 6, 1, 18, 0)
+    sets = []
+    for i in range(set_count):
+        exercise = EXERCISES[i % len(EXERCISES)]
+        sets.append({
+            "id": i + 1,
+            "session_id": 42,
+            "exercise_id": (i % len(EXERCISES)) + 1,
+            "exercise_name": exercise,
+            "reps": random.randint(3, 15),
+            "weight": random.randint(20, 200),
+            "is_kg": True,
+            "user_id": USER_ID,
+            "created_at": (start + timedelta(minutes=2 * i)).isoformat(),
+        })
+    return {"success": True, "data": sets}
+
+def default_encode(content) -> bytes:
+    """What FastAPI + JSONResponse do for a plain dict return value"""
+    return json.dumps(
+        jsonable_encoder(content),
+        ensure_ascii=False,
+        allow_nan=False,
+        indent=None,
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+def time_call(func, payload, iterations: int) -> float:
+    """Return mean milliseconds per call"""
+    func(payload)  # warm up
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func(payload)
+    return (time.perf_counter() - start) * 1000 / iterations
+
+def bench_encoding(iterations: int):
+    print("🔍 JSON encoding (mean ms per response)")
+    payloads = [
+        ("/api/all-sessions (1000 sessions)", build_all_sessions_payload()),
+        ("/api/session-sets (300 sets)", build_session_sets_payload()),
+    ]
+    for name, payload in payloads:
+        default_ms = time_call(default_encode, payload, iterations)
+        fast_ms = time_call(dump_json, payload, iterations)
+        print(f"  {name}")
+        print(f"    jsonable_encoder + json: {default_ms:8.3f} ms")
+        print(f"    orjson (FastJSON):       {fast_ms:8.3f} ms   ({default_ms / fast_ms:.1f}x faster)")
+
+def bench_compression():
+    print("\n🔍 Transfer size")
+    payloads = [
+        ("/api/all-sessions (1000 sessions)", build_all_sessions_payload()),
+        ("/api/session-sets (300 sets)", build_session_sets_payload()),
+    ]
+    for name, payload in payloads:
+        body = dump_json(payload)
+        gzip_body = gzip.compress(body, 6)
+        print(f"  {name}")
+        print(f"    identity: {len(body):8d} bytes")
+        print(f"    gzip:     {len(gzip_body):8d} bytes ({len(gzip_body) / len(body):.0%})")
+        if brotli is not None:
+            br_body = brotli.compress(body, quality=4)
+            print(f"    br:       {len(br_body):8d} bytes ({len(br_body) / len(body):.0%})")
+
+async def bench_http(url: str, concurrency: int, total: int):
+    """Fire total GET requests at url from concurrency keep-alive connections"""
+    import httpx
+
+    print(f"🔍 HTTP throughput: {total} requests, concurrency {concurrency}")
+    latencies = []
+    errors = 0
+    remaining = iter(range(total))
+
+    async def client_loop(client):
+        nonlocal errors
+        for _ in remaining:
+            start = time.perf_counter()
+            try:
+                response = await client.get(url)
+                if response.status_code >= 500:
+                    errors += 1
+            except httpx.HTTPError:
+                errors += 1
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(limits=limits, timeout=30) as client:
+        started = time.perf_counter()
+        await asyncio.gather(*(client_loop(client) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    print(f"  throughput: {total / elapsed:8.1f} req/s")
+    print(f"  p50:        {latencies[len(latencies) // 2]:8.2f} ms")
+    print(f"  p99:        {latencies[int(len(latencies) * 0.99) - 1]:8.2f} ms")
+    print(f"  errors:     {errors:8d}")
+
+def main():
+    """Run all benchmarks"""
+    if len(sys.argv) > 2 and sys.argv[1] == "http":
+        concurrency = int(sys.argv[3]) if len(sys.argv) > 3 else 64
+        total = int(sys.argv[4]) if len(sys.argv) > 4 else 5000
+        asyncio.run(bench_http(sys.argv[2], concurrency, total))
+        return
+
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    random.seed(0)
+    print("⏱️  Response Path Benchmark")
+    print("=" * 50)
+    bench_encoding(iterations)
+    bench_compression()
+
+if __name__ == "__main__":
+    main()
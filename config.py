@@ -1,13 +1,19 @@
 import os
 from dotenv import load_dotenv
-from supabase import create_client, Client
+from supabase import create_client, Client, ClientOptions
 
 load_dotenv()
 
 # Supabase configuration
 supabase_url = os.getenv("SUPABASE_PROJECT_URL", "")
 supabase_key = os.getenv("SUPABASE_ANON_PUBLIC_KEY", "")
-supabase: Client = create_client(supabase_url, supabase_key)
+BACKEND_TIMEOUT_SECONDS = float(os.getenv("BACKEND_TIMEOUT_SECONDS", "5"))  # per Supabase HTTP call
+supabase: Client = create_client(supabase_url, supabase_key, options=ClientOptions(postgrest_client_timeout=BACKEND_TIMEOUT_SECONDS))
+
+def reset_backend_connections():
+    """Drop the pooled PostgREST client so a forked worker doesn't share the parent's sockets"""
+    # Same reset supabase-py does itself on auth state changes
+    supabase._postgrest = None
 
 # Security configuration
 ENVIRONMENT = os.getenv("ENVIRONMENT", "development")
@@ -17,6 +23,57 @@ RATE_LIMIT_WINDOW = int(os.getenv("RATE_LIMIT_WINDOW", "60"))
 SESSION_TIMEOUT_MINUTES = int(os.getenv("SESSION_TIMEOUT_MINUTES", "60"))
 LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
 
+# Logging configuration
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))  # records buffered for the writer thread before dropping
+SLOW_REQUEST_MS = float(os.getenv("SLOW_REQUEST_MS", "500"))
+SLOW_REQUEST_SAMPLE_RATE = float(os.getenv("SLOW_REQUEST_SAMPLE_RATE", "0.1"))  # share of slow requests logged with their backend calls
+
+# Performance configuration
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))  # bytes
+LAST_PERFORMANCE_SETS = int(os.getenv("LAST_PERFORMANCE_SETS", "5"))  # sets kept per user and exercise
+LAST_PERFORMANCE_CACHE_SIZE = int(os.getenv("LAST_PERFORMANCE_CACHE_SIZE", "20000"))  # user/exercise pairs kept in memory
+# Indexed sets are reloaded after this long - writes handled by other workers are only seen on reload
+LAST_PERFORMANCE_MAX_AGE_SECONDS = float(os.getenv("LAST_PERFORMANCE_MAX_AGE_SECONDS", "60"))
+PERSONAL_SUGGESTION_WEIGHT = float(os.getenv("PERSONAL_SUGGESTION_WEIGHT", "0.5"))  # added to fuzzy similarity
+EXERCISE_STATS_SEED_SETS = int(os.getenv("EXERCISE_STATS_SEED_SETS", "5000"))  # history read per user on first use
+EXERCISE_STATS_CACHE_SIZE = int(os.getenv("EXERCISE_STATS_CACHE_SIZE", "10000"))  # users whose stats are kept in memory
+EXERCISE_STATS_MAX_AGE_SECONDS = float(os.getenv("EXERCISE_STATS_MAX_AGE_SECONDS", "300"))  # stats are reseeded after this long
+EVENT_QUEUE_SIZE = int(os.getenv("EVENT_QUEUE_SIZE", "100"))  # buffered events per stream before a resync
+EVENT_HEARTBEAT_SECONDS = int(os.getenv("EVENT_HEARTBEAT_SECONDS", "15"))
+MAX_EVENT_STREAMS_PER_USER = int(os.getenv("MAX_EVENT_STREAMS_PER_USER", "5"))
+
+# Resilience configuration
+REQUEST_DEADLINE_SECONDS = float(os.getenv("REQUEST_DEADLINE_SECONDS", "10"))  # end to end, including queueing and retries
+BACKEND_READ_RETRIES = int(os.getenv("BACKEND_READ_RETRIES", "2"))
+BACKEND_RETRY_BASE_SECONDS = float(os.getenv("BACKEND_RETRY_BASE_SECONDS", "0.1"))
+CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "5"))  # consecutive failures before failing fast
+CIRCUIT_RESET_SECONDS = float(os.getenv("CIRCUIT_RESET_SECONDS", "30"))
+STALE_CACHE_SIZE = int(os.getenv("STALE_CACHE_SIZE", "1000"))  # last good read responses kept for fallback
+STALE_MAX_AGE_SECONDS = float(os.getenv("STALE_MAX_AGE_SECONDS", "3600"))
+
+# Background job configuration
+SUMMARY_REFRESH_SECONDS = float(os.getenv("SUMMARY_REFRESH_SECONDS", "60"))  # how often dirty users are recomputed
+SUMMARY_JOB_CONCURRENCY = int(os.getenv("SUMMARY_JOB_CONCURRENCY", "2"))  # summaries computed at once
+SUMMARY_WEEKS = int(os.getenv("SUMMARY_WEEKS", "12"))  # weeks covered by a summary
+SUMMARY_CACHE_SIZE = int(os.getenv("SUMMARY_CACHE_SIZE", "10000"))  # users whose summaries are kept in memory
+# Rows per page when reading a whole table - must not exceed PostgREST's max-rows (1000 on Supabase)
+BACKEND_PAGE_SIZE = int(os.getenv("BACKEND_PAGE_SIZE", "1000"))
+CATALOG_REFRESH_SECONDS = float(os.getenv("CATALOG_REFRESH_SECONDS", "300"))  # how often dim_exercises is re-read
+CATALOG_HISTORY_VERSIONS = int(os.getenv("CATALOG_HISTORY_VERSIONS", "5"))  # versions clients can get deltas from
+
+# Server configuration (run.py)
+SERVER_HOST = os.getenv("SERVER_HOST", "127.0.0.1")
+SERVER_PORT = int(os.getenv("SERVER_PORT", "8003"))
+# Production mode only. Indexes, stats, summaries and event streams are per process and not
+# invalidated across workers, so more than one worker can serve stale per-user data.
+WEB_WORKERS = int(os.getenv("WEB_WORKERS", "1"))
+UVICORN_LOOP = os.getenv("UVICORN_LOOP", "auto")  # auto picks uvloop when installed
+UVICORN_HTTP = os.getenv("UVICORN_HTTP", "auto")  # auto picks httptools when installed
+KEEPALIVE_SECONDS = int(os.getenv("KEEPALIVE_SECONDS", "5"))
+SOCKET_BACKLOG = int(os.getenv("SOCKET_BACKLOG", "2048"))
+GRACEFUL_TIMEOUT_SECONDS = int(os.getenv("GRACEFUL_TIMEOUT_SECONDS", "30"))  # drain time for in-flight requests
+WORKER_TIMEOUT_SECONDS = int(os.getenv("WORKER_TIMEOUT_SECONDS", "60"))  # silent workers are restarted after this
+
 # Test mode configuration (for development only)
 ENABLE_TEST_MODE = os.getenv("ENABLE_TEST_MODE", "false").lower() == "true"
 TEST_USER_ID = os.getenv("TEST_USER_ID", "")
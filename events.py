@@ -0,0 +1,92 @@
+import asyncio
+import threading
+from collections import defaultdict
+from typing import Any, Dict, List, Optional
+
+from fastapi import HTTPException
+from config import EVENT_QUEUE_SIZE, MAX_EVENT_STREAMS_PER_USER
+from responses import dump_json
+
+# Sent instead of the backlog when a subscriber falls behind - the client refetches
+RESYNC_EVENT = {"type": "resync", "data": None}
+
+class Subscription:
+    """One open event stream. Events are delivered on the event loop that subscribed."""
+
+    def __init__(self, hub: "EventHub", user_id: str, loop: asyncio.AbstractEventLoop, max_queue: int):
+        self.hub = hub
+        self.user_id = user_id
+        self.loop = loop
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+
+    def deliver(self, event: Dict[str, Any]):
+        """Queue an event - must run on self.loop"""
+        if self.queue.full():
+            # Slow consumer: drop the backlog rather than grow without bound or block publishers
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(RESYNC_EVENT)
+            return
+        self.queue.put_nowait(event)
+
+    async def get(self, timeout: float) -> Optional[Dict[str, Any]]:
+        """Next event, or None if nothing arrived within timeout"""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def close(self):
+        self.hub.unsubscribe(self)
+
+class EventHub:
+    """In-process pub/sub of per-user change events.
+
+    Publishing is thread-safe (the write paths run on the backend thread) and never
+    blocks: each subscriber has a bounded queue and is told to resync if it overflows.
+    """
+
+    def __init__(self, max_queue: int = EVENT_QUEUE_SIZE, max_streams_per_user: int = MAX_EVENT_STREAMS_PER_USER):
+        self.max_queue = max_queue
+        self.max_streams_per_user = max_streams_per_user
+        self._subscribers: Dict[str, List[Subscription]] = defaultdict(list)
+        self._lock = threading.Lock()
+
+    def subscribe(self, user_id: str) -> Subscription:
+        """Open a stream for a user - call from the event loop that will consume it"""
+        subscription = Subscription(self, user_id, asyncio.get_running_loop(), self.max_queue)
+        with self._lock:
+            if len(self._subscribers[user_id]) >= self.max_streams_per_user:
+                raise HTTPException(status_code=429, detail="Too many open event streams")
+            self._subscribers[user_id].append(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.user_id, [])
+            if subscription in subscribers:
+                subscribers.remove(subscription)
+            if not subscribers:
+                self._subscribers.pop(subscription.user_id, None)
+
+    def publish(self, user_id: str, event_type: str, data: Any):
+        """Send an event to every open stream of a user"""
+        event = {"type": event_type, "data": data}
+        with self._lock:
+            subscribers = list(self._subscribers.get(user_id, []))
+        for subscription in subscribers:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.deliver, event)
+            except RuntimeError:
+                # Loop already closed - the stream is going away
+                self.unsubscribe(subscription)
+
+    def subscriber_count(self, user_id: str) -> int:
+        with self._lock:
+            return len(self._subscribers.get(user_id, []))
+
+def format_sse(event: Dict[str, Any]) -> bytes:
+    """Encode an event as a Server-Sent Events message"""
+    return b"event: " + event["type"].encode() + b"\ndata: " + dump_json(event["data"]) + b"\n\n"
+
+event_hub = EventHub()
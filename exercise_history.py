@@ -0,0 +1,201 @@
+import math
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from config import (
+    LAST_PERFORMANCE_SETS, LAST_PERFORMANCE_CACHE_SIZE, LAST_PERFORMANCE_MAX_AGE_SECONDS,
+    EXERCISE_STATS_CACHE_SIZE, EXERCISE_STATS_MAX_AGE_SECONDS,
+)
+
+# Personal suggestion scores halve for every RECENCY_HALF_LIFE_DAYS since an exercise was last logged
+RECENCY_HALF_LIFE_DAYS = 30
+
+# Columns kept per indexed set - enough to prefill the exercise form
+INDEXED_SET_FIELDS = ("id", "session_id", "exercise_id", "reps", "weight", "is_kg", "created_at")
+
+class LastPerformanceIndex:
+    """Most recent sets per (user, exercise), newest first.
+
+    A key is loaded from the backend on its first lookup, then kept current by the
+    set write paths. Removing an indexed set drops the key so the next lookup reloads it.
+    Bounded LRU like the stale cache; a key is reloaded max_age_seconds after it was
+    loaded, so writes handled by another worker process show up.
+    """
+
+    def __init__(self, max_sets: int = LAST_PERFORMANCE_SETS, max_entries: int = LAST_PERFORMANCE_CACHE_SIZE,
+                 max_age_seconds: float = LAST_PERFORMANCE_MAX_AGE_SECONDS):
+        self.max_sets = max_sets
+        self.max_entries = max_entries
+        self.max_age_seconds = max_age_seconds
+        # index key -> (loaded at, sets)
+        self._sets: "OrderedDict[Tuple[str, str], Tuple[float, List[Dict[str, Any]]]]" = OrderedDict()
+        self._set_keys: Dict[Any, Tuple[str, str]] = {}  # set id -> index key
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(user_id: str, exercise_id: Any) -> Tuple[str, str]:
+        return (user_id, str(exercise_id))
+
+    def get(self, user_id: str, exercise_id: Any) -> Optional[List[Dict[str, Any]]]:
+        """Return the indexed sets, or None if this key isn't loaded or has expired"""
+        key = self._key(user_id, exercise_id)
+        with self._lock:
+            entry = self._sets.get(key)
+            if entry is None:
+                return None
+            if time.monotonic() - entry[0] > self.max_age_seconds:
+                self._drop(key)
+                return None
+            self._sets.move_to_end(key)
+            return list(entry[1])
+
+    def load(self, user_id: str, exercise_id: Any, rows: List[Dict[str, Any]]):
+        """Seed a key from backend rows ordered newest first"""
+        key = self._key(user_id, exercise_id)
+        sets = [self._compact(row) for row in rows[:self.max_sets]]
+        with self._lock:
+            self._drop(key)
+            self._sets[key] = (time.monotonic(), sets)
+            for row in sets:
+                self._set_keys[row["id"]] = key
+            while len(self._sets) > self.max_entries:
+                self._drop(next(iter(self._sets)))
+
+    def record(self, row: Dict[str, Any]):
+        """Add a newly inserted set. Unloaded keys are skipped - their first lookup reads it from the backend."""
+        key = self._key(row["user_id"], row["exercise_id"])
+        with self._lock:
+            entry = self._sets.get(key)
+            if entry is None:
+                return
+            sets = entry[1]
+            sets.insert(0, self._compact(row))
+            self._set_keys[row["id"]] = key
+            for trimmed in sets[self.max_sets:]:
+                self._set_keys.pop(trimmed["id"], None)
+            del sets[self.max_sets:]
+
+    def update(self, row: Dict[str, Any]):
+        """Apply an edited set if it is currently indexed"""
+        with self._lock:
+            key = self._set_keys.get(row["id"])
+            if key is None:
+                return
+            sets = self._sets[key][1]
+            sets[:] = [self._compact(row) if indexed["id"] == row["id"] else indexed for indexed in sets]
+
+    def discard(self, set_id: Any):
+        """Forget the key holding a removed set so it is reloaded with the next most recent sets"""
+        with self._lock:
+            key = self._set_keys.get(set_id)
+            if key is not None:
+                self._drop(key)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._sets)
+
+    def _drop(self, key: Tuple[str, str]):
+        entry = self._sets.pop(key, None)
+        for row in entry[1] if entry else []:
+            self._set_keys.pop(row["id"], None)
+
+    @staticmethod
+    def _compact(row: Dict[str, Any]) -> Dict[str, Any]:
+        return {field: row.get(field) for field in INDEXED_SET_FIELDS}
+
+class ExerciseStats:
+    """Per-user exercise frequency and recency, used to personalise suggestions.
+
+    A user's stats are seeded from their set history on first use and then
+    updated incrementally from set inserts. Bounded LRU; a user is reseeded
+    max_age_seconds after seeding to pick up writes made through other workers.
+    """
+
+    def __init__(self, max_entries: int = EXERCISE_STATS_CACHE_SIZE, max_age_seconds: float = EXERCISE_STATS_MAX_AGE_SECONDS):
+        self.max_entries = max_entries
+        self.max_age_seconds = max_age_seconds
+        # user id -> (seeded at, exercise id -> [count, last used timestamp, exercise name])
+        self._users: "OrderedDict[str, Tuple[float, Dict[str, List[Any]]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def is_loaded(self, user_id: str) -> bool:
+        """True if the user's stats are seeded and not yet due for reseeding"""
+        with self._lock:
+            entry = self._users.get(user_id)
+            if entry is None:
+                return False
+            if time.monotonic() - entry[0] > self.max_age_seconds:
+                del self._users[user_id]
+                return False
+            self._users.move_to_end(user_id)
+            return True
+
+    def load(self, user_id: str, rows: List[Dict[str, Any]]):
+        """Seed a user from rows with exercise_id, exercise_name and created_at"""
+        stats: Dict[str, List[Any]] = {}
+        for row in rows:
+            self._add(stats, row["exercise_id"], row["created_at"], row.get("exercise_name"))
+        with self._lock:
+            self._users[user_id] = (time.monotonic(), stats)
+            self._users.move_to_end(user_id)
+            while len(self._users) > self.max_entries:
+                self._users.popitem(last=False)
+
+    def record(self, user_id: str, exercise_id: Any, created_at: Optional[str], exercise_name: Optional[str] = None):
+        """Count a newly inserted set. Users that aren't loaded yet pick it up when seeded."""
+        with self._lock:
+            entry = self._users.get(user_id)
+            if entry is not None:
+                self._add(entry[1], exercise_id, created_at, exercise_name)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._users)
+
+    def scores(self, user_id: str, now: Optional[float] = None) -> Dict[str, float]:
+        """Exercise name -> personal score in [0, 1], blending log frequency with recency decay"""
+        now = now if now is not None else time.time()
+        with self._lock:
+            entry = self._users.get(user_id)
+            entries = list(entry[1].values()) if entry else []
+
+        raw = {}
+        for count, last_used, name in entries:
+            if not name:
+                continue
+            age_days = max(now - last_used, 0) / 86400
+            raw[name] = math.log1p(count) * 0.5 ** (age_days / RECENCY_HALF_LIFE_DAYS)
+
+        top = max(raw.values(), default=0)
+        if top <= 0:
+            return {}
+        return {name: score / top for name, score in raw.items()}
+
+    @staticmethod
+    def _add(stats: Dict[str, List[Any]], exercise_id: Any, created_at: Optional[str], exercise_name: Optional[str]):
+        used_at = _timestamp(created_at)
+        entry = stats.get(str(exercise_id))
+        if entry is None:
+            stats[str(exercise_id)] = [1, used_at, exercise_name]
+            return
+        entry[0] += 1
+        entry[1] = max(entry[1], used_at)
+        entry[2] = entry[2] or exercise_name
+
+def _timestamp(value: Optional[str]) -> float:
+    if not value:
+        return time.time()
+    try:
+        parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        return time.time()
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+last_performance = LastPerformanceIndex()
+exercise_stats = ExerciseStats()
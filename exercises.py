@@ -1,18 +1,94 @@
-from config import supabase
-from typing import Dict
+from config import supabase, PERSONAL_SUGGESTION_WEIGHT, EXERCISE_STATS_SEED_SETS, CATALOG_HISTORY_VERSIONS
+from exercise_history import exercise_stats
+from workouts import verify_user, select_all
+from typing import Dict, List, Optional
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
 
-def get_exercise_suggestions(query: str, max_suggestions: int = 10) -> Dict:
-    """Exercise search using PostgreSQL fuzzy search with fallback."""
+logger = logging.getLogger(__name__)
+
+class ExerciseCatalog:
+    """Versioned snapshot of dim_exercises names for clients that search locally.
+    
+    The version is a content hash, so it only changes when the catalog does. A few
+    previous versions are remembered so clients can download just the difference.
+    """
+    
+    def __init__(self, history_versions: int = CATALOG_HISTORY_VERSIONS):
+        self.history_versions = history_versions
+        self.version: Optional[str] = None
+        self.names: List[str] = []
+        self._history: "OrderedDict[str, frozenset]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def refresh(self) -> str:
+        """Reload dim_exercises, returning the (possibly unchanged) version"""
+        rows = select_all(lambda: supabase.table("dim_exercises").select("exercise").order("exercise").order("id"))
+        names = sorted({ex["exercise"] for ex in rows})
+        version = hashlib.sha1("\n".join(names).encode("utf-8")).hexdigest()[:16]
+        with self._lock:
+            if version != self.version:
+                self.version = version
+                self.names = names
+                self._history[version] = frozenset(names)
+                while len(self._history) > self.history_versions:
+                    self._history.popitem(last=False)
+            return self.version
+    
+    def get(self, since: Optional[str] = None) -> Dict:
+        """Full catalog, or only the changes since a version the client already has"""
+        if self.version is None:
+            self.refresh()
+        with self._lock:
+            if since == self.version:
+                return {"version": self.version, "delta": {"added": [], "removed": []}}
+            previous = self._history.get(since) if since else None
+            if previous is not None:
+                current = self._history[self.version]
+                return {"version": self.version, "delta": {
+                    "added": sorted(current - previous),
+                    "removed": sorted(previous - current)
+                }}
+            return {"version": self.version, "exercises": list(self.names)}
+
+exercise_catalog = ExerciseCatalog()
+
+def get_exercise_catalog(since: Optional[str] = None) -> Dict:
+    try:
+        return {"success": True, **exercise_catalog.get(since)}
+    except Exception as e:
+        logger.exception("Exercise catalog unavailable")
+        return {"success": False, "error": str(e)}
+
+def get_exercise_suggestions(query: str, max_suggestions: int = 10, user_id: Optional[str] = None, access_token: Optional[str] = None) -> Dict:
+    """Exercise search using PostgreSQL fuzzy search with fallback, personalised when a user is given."""
+    personal_scores = _personal_scores(user_id, access_token)
     try:
         if len(query.strip()) < 2:
-            result = supabase.table("dim_exercises").select("exercise").limit(max_suggestions).execute()
-            return {"success": True, "data": [{"name": ex["exercise"]} for ex in result.data]}
+            # Short query - the user's own top exercises first, padded from the catalog
+            prefix = query.strip().lower()
+            top = sorted(
+                (name for name in personal_scores if name.lower().startswith(prefix)),
+                key=lambda name: personal_scores[name],
+                reverse=True
+            )[:max_suggestions]
+            suggestions = [{"name": name} for name in top]
+            if len(suggestions) < max_suggestions:
+                query_builder = supabase.table("dim_exercises").select("exercise")
+                if prefix:
+                    query_builder = query_builder.ilike("exercise", f"{prefix}%")
+                result = query_builder.order("exercise").limit(max_suggestions + len(top)).execute()
+                suggestions += [{"name": ex["exercise"]} for ex in result.data if ex["exercise"] not in personal_scores]
+            return {"success": True, "data": suggestions[:max_suggestions]}
         
         # Use the fuzzy PostgreSQL search function without threshold - return top matches
+        # Over-fetch when personalising so the user's exercises can be re-ranked into the top
         result = supabase.rpc('search_exercises_fuzzy', {
             'search_term': query.strip(),
             'similarity_threshold': 0.0,  # No threshold - return all matches ranked by similarity
-            'max_results': max_suggestions
+            'max_results': max_suggestions * 2 if personal_scores else max_suggestions
         }).execute()
         
         if result.data:
@@ -24,15 +100,61 @@ def get_exercise_suggestions(query: str, max_suggestions: int = 10) -> Dict:
                     suggestion["similarity"] = ex["similarity"]
                 suggestions.append(suggestion)
             
-            return {"success": True, "data": suggestions}
+            return {"success": True, "data": _rank_personal(suggestions, query.strip(), personal_scores)[:max_suggestions]}
         
         # Fallback to simple ILIKE search if the RPC function doesn't exist
         return _fallback_search(query.strip(), max_suggestions)
         
     except Exception as e:
         # If PostgreSQL function fails, fallback to simple search
+        logger.debug("Fuzzy exercise search failed, using fallback", exc_info=True)
         return _fallback_search(query.strip(), max_suggestions)
 
+def _personal_scores(user_id: Optional[str], access_token: Optional[str]) -> Dict[str, float]:
+    """Exercise name -> personal score for the user, seeding their stats on first use."""
+    if not user_id or not access_token:
+        return {}
+    try:
+        # Every call - the stats are served from memory, outside row-level security
+        verify_user(user_id, access_token)
+        if not exercise_stats.is_loaded(user_id):
+            sets_result = supabase.table("session_sets").select("exercise_id, created_at").eq("user_id", user_id).order("created_at", desc=True).limit(EXERCISE_STATS_SEED_SETS).execute()
+            
+            # Resolve catalog ids to names in one query; unmatched ids are free-text exercise names
+            exercise_ids = list({row["exercise_id"] for row in sets_result.data if str(row["exercise_id"]).isdigit()})
+            names = {}
+            if exercise_ids:
+                names_result = supabase.table("dim_exercises").select("id, exercise").in_("id", exercise_ids).execute()
+                names = {str(ex["id"]): ex["exercise"] for ex in names_result.data}
+            
+            exercise_stats.load(user_id, [
+                {**row, "exercise_name": names.get(str(row["exercise_id"]), str(row["exercise_id"]))}
+                for row in sets_result.data
+            ])
+        return exercise_stats.scores(user_id)
+    except Exception:
+        # Suggestions still work unpersonalised, including for a token that isn't the user's
+        logger.warning("Personal exercise scores unavailable", exc_info=True)
+        return {}
+
+def _rank_personal(suggestions: List[Dict], query: str, personal_scores: Dict[str, float]) -> List[Dict]:
+    """Blend fuzzy similarity with the user's frequency/recency score."""
+    if not personal_scores:
+        return suggestions
+    
+    # Make sure the user's own matching exercises are candidates even if the fuzzy search missed them
+    query_lower = query.lower()
+    seen = {suggestion["name"] for suggestion in suggestions}
+    for name in personal_scores:
+        if name not in seen and query_lower in name.lower():
+            suggestions.append({"name": name, "similarity": len(query) / len(name)})
+    
+    return sorted(
+        suggestions,
+        key=lambda s: s.get("similarity", 0) + PERSONAL_SUGGESTION_WEIGHT * personal_scores.get(s["name"], 0),
+        reverse=True
+    )
+
 def _fallback_search(query: str, max_suggestions: int) -> Dict:
     """Fallback search using simple ILIKE pattern matching."""
     try:
@@ -42,4 +164,5 @@ def _fallback_search(query: str, max_suggestions: int) -> Dict:
         return {"success": True, "data": [{"name": ex["exercise"]} for ex in result.data]}
         
     except Exception as e:
+        logger.exception("Exercise search failed")
         return {"success": False, "error": str(e)}
@@ -0,0 +1,61 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable, List, Tuple
+
+from config import SUMMARY_REFRESH_SECONDS, SUMMARY_JOB_CONCURRENCY, CATALOG_REFRESH_SECONDS
+from exercises import exercise_catalog
+from singleflight import run_backend
+from summaries import dirty_users
+from workouts import compute_weekly_summary
+
+logger = logging.getLogger(__name__)
+
+class JobScheduler:
+    """Runs async jobs on fixed intervals for the lifetime of the app"""
+
+    def __init__(self):
+        self._jobs: List[Tuple[str, float, Callable[[], Awaitable[None]]]] = []
+        self._tasks: List[asyncio.Task] = []
+
+    def every(self, seconds: float, name: str, job: Callable[[], Awaitable[None]]):
+        self._jobs.append((name, seconds, job))
+
+    def start(self):
+        self._tasks = [asyncio.create_task(self._run(name, seconds, job), name=name) for name, seconds, job in self._jobs]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _run(self, name: str, seconds: float, job: Callable[[], Awaitable[None]]):
+        while True:
+            await asyncio.sleep(seconds)
+            try:
+                await job()
+            except Exception:
+                # Keep the schedule going - the next run retries
+                logger.exception("Job failed", extra={"job": name})
+
+async def refresh_weekly_summaries(concurrency: int = SUMMARY_JOB_CONCURRENCY):
+    """Recompute summaries for users with writes since the last run"""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def refresh(user_id: str, access_token: str):
+        async with semaphore:
+            try:
+                await run_backend(compute_weekly_summary, user_id, access_token)
+            except Exception:
+                # Token may have expired - the next write marks the user dirty again
+                logger.info("Weekly summary refresh skipped", exc_info=True, extra={"user_id": user_id})
+
+    await asyncio.gather(*(refresh(user_id, access_token) for user_id, access_token in dirty_users.drain()))
+
+async def refresh_exercise_catalog():
+    """Pick up dim_exercises changes so clients get a new catalog version"""
+    await run_backend(exercise_catalog.refresh)
+
+scheduler = JobScheduler()
+scheduler.every(SUMMARY_REFRESH_SECONDS, "weekly-summaries", refresh_weekly_summaries)
+scheduler.every(CATALOG_REFRESH_SECONDS, "exercise-catalog", refresh_exercise_catalog)
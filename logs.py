@@ -0,0 +1,131 @@
+import atexit
+import logging
+import queue
+import random
+import re
+import sys
+import time
+import uuid
+from contextvars import ContextVar
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Dict, List, Optional
+
+from config import LOG_LEVEL, LOG_QUEUE_SIZE, SLOW_REQUEST_MS, SLOW_REQUEST_SAMPLE_RATE
+from responses import dump_json
+
+logger = logging.getLogger("access")
+
+# Client supplied X-Request-ID values are only reused if they look like an id
+TRACE_ID_PATTERN = re.compile(r"^[A-Za-z0-9._-]{1,64}$")
+
+# Attributes every LogRecord has - anything else was passed with extra= and is logged as a field
+_RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {"message", "trace_id"}
+
+class RequestTrace:
+    """Per-request trace id and the backend calls made on its behalf"""
+
+    def __init__(self, trace_id: str):
+        self.trace_id = trace_id
+        self.started = time.perf_counter()
+        self.backend_calls: List[Dict[str, Any]] = []
+
+    def record_backend_call(self, name: str, queued_ms: float, duration_ms: float):
+        # Called from the backend thread; list.append is atomic
+        self.backend_calls.append({"call": name, "queued_ms": round(queued_ms, 2), "duration_ms": round(duration_ms, 2)})
+
+    def elapsed_ms(self) -> float:
+        return (time.perf_counter() - self.started) * 1000
+
+_current_trace: ContextVar[Optional[RequestTrace]] = ContextVar("request_trace", default=None)
+
+def start_trace(trace_id: Optional[str] = None) -> RequestTrace:
+    """Begin a trace for the current request, reusing a well-formed incoming id"""
+    if not trace_id or not TRACE_ID_PATTERN.match(trace_id):
+        trace_id = uuid.uuid4().hex
+    trace = RequestTrace(trace_id)
+    _current_trace.set(trace)
+    return trace
+
+def current_trace() -> Optional[RequestTrace]:
+    return _current_trace.get()
+
+def log_request(trace: RequestTrace, method: str, path: str, status_code: int):
+    """Log a finished request; slow ones are sampled with their backend-call breakdown"""
+    duration_ms = trace.elapsed_ms()
+    fields = {"method": method, "path": path, "status": status_code, "duration_ms": round(duration_ms, 2)}
+    if status_code >= 500:
+        logger.error("Request failed", extra={**fields, "backend_calls": trace.backend_calls})
+    elif duration_ms >= SLOW_REQUEST_MS and random.random() < SLOW_REQUEST_SAMPLE_RATE:
+        logger.warning("Slow request", extra={**fields, "backend_calls": trace.backend_calls})
+    else:
+        logger.debug("Request", extra=fields)
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": self.formatTime(record, "%Y-%m-%dT%H:%M:%S"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "trace_id": getattr(record, "trace_id", None),
+        }
+        entry.update({key: value for key, value in vars(record).items() if key not in _RECORD_ATTRIBUTES})
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return dump_json(entry).decode("utf-8")
+
+class TraceQueueHandler(QueueHandler):
+    """Hand records to the writer thread without blocking; drop them if it falls behind"""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # The trace id lives in a context variable, so capture it on the calling thread.
+        # Formatting (JSON encoding, tracebacks) is left to the writer thread.
+        trace = _current_trace.get()
+        record.trace_id = trace.trace_id if trace else None
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+_listener: Optional[QueueListener] = None
+
+def setup_logging(level: str = LOG_LEVEL):
+    """Send log records through a bounded queue to a background writer thread.
+
+    Call again in a forked worker - threads don't survive fork, so it needs its own writer.
+    """
+    global _listener
+    log_queue: queue.Queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+    writer = logging.StreamHandler(sys.stderr)
+    writer.setFormatter(JsonFormatter())
+
+    root = logging.getLogger()
+    for handler in [handler for handler in root.handlers if isinstance(handler, TraceQueueHandler)]:
+        root.removeHandler(handler)
+    root.addHandler(TraceQueueHandler(log_queue))
+    root.setLevel(level.upper())
+    # The HTTP client logs every backend request at INFO - the request trace already times them
+    for name in ("httpx", "httpcore", "hpack"):
+        logging.getLogger(name).setLevel(max(root.level, logging.WARNING))
+
+    _listener = QueueListener(log_queue, writer)
+    _listener.start()
+    atexit.register(stop_logging)
+
+def stop_logging():
+    """Flush queued records and stop the writer thread"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
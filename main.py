@@ -1,20 +1,46 @@
 from fastapi import FastAPI, HTTPException, Request
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, StreamingResponse, Response
 from fastapi.exceptions import HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
+from fastapi.exception_handlers import http_exception_handler
+import logging
 import os
 import time
+from contextlib import asynccontextmanager
 from collections import defaultdict
 from datetime import datetime, timedelta
+from typing import Optional
 from pydantic import BaseModel, validator, Field
 from auth import login_user, signup_user, reset_password
-from exercises import get_exercise_suggestions
-from workouts import create_workout_session, add_set_to_session, get_current_session, get_sessions_by_date, rename_workout_session, get_all_sessions, duplicate_set, edit_set, remove_set, get_session_sets
-from config import CORS_ORIGINS, RATE_LIMIT_REQUESTS, RATE_LIMIT_WINDOW, ENVIRONMENT
-
-app = FastAPI(title="Workout Tracker", version="1.0.0")
+from exercises import get_exercise_suggestions, get_exercise_catalog
+from workouts import verify_user, create_workout_session, add_set_to_session, get_current_session, get_sessions_by_date, rename_workout_session, get_all_sessions, duplicate_set, duplicate_workout_session, edit_set, remove_set, get_session_sets, get_last_performance, get_calendar, get_weekly_summary
+from singleflight import SingleFlight
+from resilience import ResilientBackend
+from events import event_hub, format_sse
+from jobs import scheduler
+from responses import FastJSONResponse, FastJSONRoute, CompressionMiddleware
+from logs import setup_logging, start_trace, log_request
+from config import CORS_ORIGINS, RATE_LIMIT_REQUESTS, RATE_LIMIT_WINDOW, ENVIRONMENT, COMPRESSION_MIN_SIZE, EVENT_HEARTBEAT_SECONDS
+
+# Structured JSON logs, written from a background thread so requests never block on I/O
+setup_logging()
+logger = logging.getLogger(__name__)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Background jobs (weekly summary precomputation) run for the lifetime of the app
+    scheduler.start()
+    yield
+    await scheduler.stop()
+
+app = FastAPI(title="Workout Tracker", version="1.0.0", default_response_class=FastJSONResponse, lifespan=lifespan)
+# Skip the jsonable_encoder walk for endpoints returning plain dicts - must be set before routes are declared
+app.router.route_class = FastJSONRoute
+
+# Compress large payloads (e.g. /api/all-sessions) with brotli or gzip depending on the client
+app.add_middleware(CompressionMiddleware, minimum_size=COMPRESSION_MIN_SIZE)
 
 # Security middleware
 app.add_middleware(
@@ -32,6 +58,17 @@ if ENVIRONMENT == "production":
         allowed_hosts=["your-domain.com", "*.your-domain.com"]
     )
 
+# Backend calls get deadlines and a circuit breaker; reads retry and fall back to stale data
+backend = ResilientBackend()
+
+# Identical concurrent reads share one backend call; writes call forget_user(user_id)
+reads = SingleFlight(runner=backend.read)
+
+def forget_user(user_id: str):
+    """Make reads after a write go to the backend instead of joining an earlier call"""
+    reads.forget(user_id)
+    backend.forget(user_id)
+
 # Rate limiting middleware
 rate_limit_storage = defaultdict(list)
 
@@ -64,6 +101,21 @@ async def rate_limit_middleware(request: Request, call_next):
     
     return response
 
+# Request tracing middleware - added last so it wraps everything, including rate limiting
+@app.middleware("http")
+async def trace_middleware(request: Request, call_next):
+    trace = start_trace(request.headers.get("x-request-id"))
+    try:
+        response = await call_next(request)
+    except Exception:
+        log_request(trace, request.method, request.url.path, 500)
+        raise
+    
+    # Only the path is logged - query strings carry access tokens
+    log_request(trace, request.method, request.url.path, response.status_code)
+    response.headers["X-Request-ID"] = trace.trace_id
+    return response
+
 # Serve React build files
 if os.path.exists("dist"):
     app.mount("/assets", StaticFiles(directory="dist/assets"), name="assets")
@@ -128,6 +180,7 @@ class AddSetRequest(BaseModel):
 class RenameSessionRequest(BaseModel):
     session_id: int = Field(..., gt=0)
     name: str = Field(..., min_length=1, max_length=100)
+    expected_updated_at: Optional[str] = Field(None, max_length=64)  # optimistic concurrency precondition
     user_id: str = Field(..., min_length=36, max_length=36)
     access_token: str = Field(..., min_length=10, max_length=2048)
 
@@ -136,86 +189,183 @@ class DuplicateSetRequest(BaseModel):
     user_id: str = Field(..., min_length=36, max_length=36)
     access_token: str = Field(..., min_length=10, max_length=2048)
 
+class DuplicateSessionRequest(BaseModel):
+    session_id: int = Field(..., gt=0)
+    workout_date: str
+    reps_increment: int = Field(0, ge=-1000, le=1000)
+    weight_increment: int = Field(0, ge=-10000, le=10000)
+    user_id: str = Field(..., min_length=36, max_length=36)
+    access_token: str = Field(..., min_length=10, max_length=2048)
+
 class EditSetRequest(BaseModel):
     set_id: int = Field(..., gt=0)
     reps: int = Field(..., gt=0, le=1000)
     weight: int = Field(..., gt=0, le=10000)
+    expected_updated_at: Optional[str] = Field(None, max_length=64)
     user_id: str = Field(..., min_length=36, max_length=36)
     access_token: str = Field(..., min_length=10, max_length=2048)
 
 class RemoveSetRequest(BaseModel):
     set_id: int = Field(..., gt=0)
+    expected_updated_at: Optional[str] = Field(None, max_length=64)
     user_id: str = Field(..., min_length=36, max_length=36)
     access_token: str = Field(..., min_length=10, max_length=2048)
 
 # Auth endpoints
 @app.post("/api/login")
 async def login(request: LoginRequest):
-    return login_user(request.email, request.password)
+    return await backend.write(login_user, request.email, request.password)
 
 @app.post("/api/signup")
 async def signup(request: SignupRequest):
-    return signup_user(request.email, request.password)
+    return await backend.write(signup_user, request.email, request.password)
 
 @app.post("/api/forgot-password")
 async def forgot_password(request: ForgotPasswordRequest):
-    return reset_password(request.email)
+    return await backend.write(reset_password, request.email)
 
 # Exercise endpoints
 @app.get("/api/exercise-suggestions")
-async def exercise_suggestions(query: str, limit: int = 10):
-    # Input validation
-    if len(query) < 1 or len(query) > 100:
+async def exercise_suggestions(query: str, limit: int = 10, user_id: Optional[str] = None, access_token: Optional[str] = None):
+    # Input validation - an empty query is allowed for signed-in users and returns their top exercises
+    if len(query) > 100 or (len(query) < 1 and not user_id):
         raise HTTPException(status_code=400, detail="Query must be between 1 and 100 characters")
     if limit < 1 or limit > 50:
         raise HTTPException(status_code=400, detail="Limit must be between 1 and 50")
-    return get_exercise_suggestions(query, limit)
+    return await reads.do(("exercise-suggestions", user_id, access_token, query, limit), get_exercise_suggestions, query, limit, user_id, access_token)
+
+@app.get("/api/exercise-catalog")
+async def exercise_catalog(request: Request, since: Optional[str] = None):
+    # Clients search the catalog locally and revalidate with If-None-Match or ?since=<version>
+    if since is not None and len(since) > 64:
+        raise HTTPException(status_code=400, detail="Invalid catalog version")
+    catalog = await reads.do(("exercise-catalog", None, since), get_exercise_catalog, since)
+    if not catalog.get("success"):
+        return catalog
+    
+    etag = f'"{catalog["version"]}"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    return FastJSONResponse(catalog, headers=headers)
 
 # Workout endpoints
 @app.post("/api/create-session")
 async def create_session(request: SessionRequest):
-    return create_workout_session(request.user_id, request.access_token, request.workout_date)
+    result = await backend.write(create_workout_session, request.user_id, request.access_token, request.workout_date)
+    forget_user(request.user_id)
+    return result
 
 @app.get("/api/sessions-by-date")
-async def sessions_by_date(user_id: str, access_token: str, date: str):
-    return get_sessions_by_date(user_id, access_token, date)
+async def sessions_by_date(user_id: str, access_token: str, date: str, tz: str = "UTC"):
+    # access_token is part of the key so a bad token never shares another caller's result
+    return await reads.do(("sessions-by-date", user_id, access_token, date, tz), get_sessions_by_date, user_id, access_token, date, tz)
+
+@app.get("/api/calendar")
+async def calendar(user_id: str, access_token: str, start: str, end: str, tz: str = "UTC"):
+    return await reads.do(("calendar", user_id, access_token, start, end, tz), get_calendar, user_id, access_token, start, end, tz)
+
+@app.get("/api/weekly-summary")
+async def weekly_summary(user_id: str, access_token: str):
+    return await reads.do(("weekly-summary", user_id, access_token), get_weekly_summary, user_id, access_token)
 
 @app.post("/api/add-set")
 async def add_set(request: AddSetRequest):
-    return add_set_to_session(request.session_id, request.exercise_name, request.reps, 
-                             request.weight, request.is_kg, request.user_id, request.access_token)
+    result = await backend.write(add_set_to_session, request.session_id, request.exercise_name, request.reps, 
+                              request.weight, request.is_kg, request.user_id, request.access_token)
+    forget_user(request.user_id)
+    return result
 
 @app.get("/api/current-session")
 async def current_session(user_id: str, access_token: str):
-    return get_current_session(user_id, access_token)
+    return await reads.do(("current-session", user_id, access_token), get_current_session, user_id, access_token)
 
 @app.post("/api/rename-session")
 async def rename_session(request: RenameSessionRequest):
-    return rename_workout_session(request.session_id, request.name, request.user_id, request.access_token)
+    result = await backend.write(rename_workout_session, request.session_id, request.name, request.user_id, request.access_token,
+                              request.expected_updated_at)
+    forget_user(request.user_id)
+    return result
 
 @app.get("/api/all-sessions")
 async def all_sessions(user_id: str, access_token: str):
-    return get_all_sessions(user_id, access_token)
+    return await reads.do(("all-sessions", user_id, access_token), get_all_sessions, user_id, access_token)
 
 @app.post("/api/duplicate-set")
 async def duplicate_set_endpoint(request: DuplicateSetRequest):
-    return duplicate_set(request.set_id, request.user_id, request.access_token)
+    result = await backend.write(duplicate_set, request.set_id, request.user_id, request.access_token)
+    forget_user(request.user_id)
+    return result
+
+@app.post("/api/duplicate-session")
+async def duplicate_session_endpoint(request: DuplicateSessionRequest):
+    result = await backend.write(duplicate_workout_session, request.session_id, request.workout_date, request.user_id,
+                              request.access_token, request.reps_increment, request.weight_increment)
+    forget_user(request.user_id)
+    return result
 
 @app.post("/api/edit-set")
 async def edit_set_endpoint(request: EditSetRequest):
-    return edit_set(request.set_id, request.reps, request.weight, request.user_id, request.access_token)
+    result = await backend.write(edit_set, request.set_id, request.reps, request.weight, request.user_id, request.access_token,
+                              request.expected_updated_at)
+    forget_user(request.user_id)
+    return result
 
 @app.post("/api/remove-set")
 async def remove_set_endpoint(request: RemoveSetRequest):
-    return remove_set(request.set_id, request.user_id, request.access_token)
+    result = await backend.write(remove_set, request.set_id, request.user_id, request.access_token, request.expected_updated_at)
+    forget_user(request.user_id)
+    return result
 
 @app.get("/api/session-sets")
 async def session_sets(session_id: int, user_id: str, access_token: str):
-    return get_session_sets(session_id, user_id, access_token)
+    return await reads.do(("session-sets", user_id, access_token, session_id), get_session_sets, session_id, user_id, access_token)
+
+@app.get("/api/last-performance")
+async def last_performance_endpoint(exercise_name: str, user_id: str, access_token: str):
+    if len(exercise_name) < 1 or len(exercise_name) > 100:
+        raise HTTPException(status_code=400, detail="Exercise name must be between 1 and 100 characters")
+    return await reads.do(("last-performance", user_id, access_token, exercise_name), get_last_performance, exercise_name, user_id, access_token)
+
+# Realtime endpoint - pushes set/session changes so clients don't poll
+@app.get("/api/events")
+async def events(user_id: str, access_token: str):
+    try:
+        # The stream is keyed by user_id, so the token must belong to that user
+        await backend.write(verify_user, user_id, access_token)
+    except HTTPException as e:
+        if e.status_code in (403, 503):
+            raise
+        raise HTTPException(status_code=401, detail="Invalid session")
+    except Exception:
+        raise HTTPException(status_code=401, detail="Invalid session")
+    subscription = event_hub.subscribe(user_id)
+
+    async def stream():
+        try:
+            yield b": connected\n\n"
+            while True:
+                event = await subscription.get(EVENT_HEARTBEAT_SECONDS)
+                # Heartbeat comments keep proxies from closing an idle stream
+                yield format_sse(event) if event else b": ping\n\n"
+        finally:
+            subscription.close()
+
+    return StreamingResponse(stream(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+# Log the underlying error behind HTTPExceptions raised from a caught exception
+@app.exception_handler(HTTPException)
+async def logged_http_exception_handler(request: Request, exc: HTTPException):
+    cause = exc.__cause__ or exc.__context__
+    if cause is not None and not isinstance(cause, HTTPException):
+        logger.warning("Request error", exc_info=cause, extra={"path": request.url.path, "status": exc.status_code})
+    return await http_exception_handler(request, exc)
 
 # Custom exception handler to prevent information leakage
 @app.exception_handler(Exception)
 async def general_exception_handler(request: Request, exc: Exception):
+    logger.error("Unhandled error", exc_info=exc, extra={"path": request.url.path})
     if ENVIRONMENT == "development":
         # Show detailed errors in development
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(exc)}")
@@ -0,0 +1,42 @@
+-- Schema used by the conditional writes and the server-side set duplicate in workouts.py.
+-- Run once in the Supabase SQL editor. Safe to re-run.
+
+-- updated_at: stamped on every change, compared by rename/edit/remove (expected_updated_at)
+alter table public.workout_sessions add column if not exists updated_at timestamptz not null default now();
+alter table public.session_sets add column if not exists updated_at timestamptz not null default now();
+
+create or replace function public.set_updated_at()
+returns trigger
+language plpgsql
+as $$
+begin
+    new.updated_at = now();
+    return new;
+end;
+$$;
+
+drop trigger if exists workout_sessions_set_updated_at on public.workout_sessions;
+create trigger workout_sessions_set_updated_at
+    before update on public.workout_sessions
+    for each row execute function public.set_updated_at();
+
+drop trigger if exists session_sets_set_updated_at on public.session_sets;
+create trigger session_sets_set_updated_at
+    before update on public.session_sets
+    for each row execute function public.set_updated_at();
+
+-- duplicate_session_set: copy one set in a single INSERT ... SELECT.
+-- security invoker, so row-level security still applies to both the read and the insert.
+create or replace function public.duplicate_session_set(source_set_id bigint, owner_id uuid)
+returns setof public.session_sets
+language sql
+security invoker
+as $$
+    insert into public.session_sets (session_id, exercise_id, reps, weight, is_kg, user_id)
+    select session_id, exercise_id, reps, weight, is_kg, user_id
+    from public.session_sets
+    where id = source_set_id and user_id = owner_id
+    returning *;
+$$;
+
+grant execute on function public.duplicate_session_set(bigint, uuid) to authenticated;
@@ -0,0 +1,202 @@
+import asyncio
+import functools
+import random
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional, Tuple
+
+import httpx
+from fastapi import HTTPException
+
+from config import (
+    REQUEST_DEADLINE_SECONDS, BACKEND_READ_RETRIES, BACKEND_RETRY_BASE_SECONDS,
+    CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_RESET_SECONDS, STALE_CACHE_SIZE, STALE_MAX_AGE_SECONDS,
+)
+from singleflight import run_backend
+
+class DeadlineExceeded(Exception):
+    """The request deadline passed before the backend call could run or finish"""
+
+def is_backend_failure(exc: BaseException) -> bool:
+    """True if exc is (or wraps) a timeout or connection failure talking to Supabase.
+
+    workouts.py turns every exception into an HTTPException(400), so the original
+    error is found on the implicit exception context chain.
+    """
+    seen = set()
+    while exc is not None and id(exc) not in seen:
+        if isinstance(exc, (httpx.TransportError, DeadlineExceeded)):
+            return True
+        seen.add(id(exc))
+        exc = exc.__cause__ or exc.__context__
+    return False
+
+class CircuitBreaker:
+    """Fail fast after repeated backend failures.
+
+    closed -> open after failure_threshold consecutive failures; after reset_seconds
+    a single trial call is let through (half-open) and its outcome closes or re-opens it.
+    """
+
+    def __init__(self, failure_threshold: int = CIRCUIT_FAILURE_THRESHOLD, reset_seconds: float = CIRCUIT_RESET_SECONDS):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state()
+
+    def _state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_seconds:
+            return "half-open"
+        return "open"
+
+    def allow(self) -> bool:
+        with self._lock:
+            state = self._state()
+            if state == "closed":
+                return True
+            if state == "half-open" and not self.trial_in_flight:
+                self.trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self.trial_in_flight = False
+
+    def release_trial(self):
+        """Let a new half-open trial through if this call ended without recording an outcome"""
+        with self._lock:
+            self.trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self.trial_in_flight = False
+            if self.opened_at is not None or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+
+class StaleCache:
+    """Bounded LRU of the last good response per read key"""
+
+    def __init__(self, max_entries: int = STALE_CACHE_SIZE, max_age_seconds: float = STALE_MAX_AGE_SECONDS):
+        self.max_entries = max_entries
+        self.max_age_seconds = max_age_seconds
+        self._entries: "OrderedDict[Tuple[Hashable, ...], Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def put(self, key: Tuple[Hashable, ...], value: Any):
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get(self, key: Tuple[Hashable, ...]) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or time.monotonic() - entry[0] > self.max_age_seconds:
+                return None
+            return entry[1]
+
+    def forget(self, user_id: Optional[str]):
+        with self._lock:
+            for key in [key for key in self._entries if len(key) > 1 and key[1] == user_id]:
+                del self._entries[key]
+
+class ResilientBackend:
+    """Deadlines, retries and a circuit breaker around backend calls.
+
+    Reads retry with jittered backoff and fall back to the last good response
+    (marked "stale": true) while the backend is failing. Writes never retry.
+    """
+
+    def __init__(self, breaker: Optional[CircuitBreaker] = None, stale: Optional[StaleCache] = None,
+                 deadline_seconds: float = REQUEST_DEADLINE_SECONDS, read_retries: int = BACKEND_READ_RETRIES,
+                 retry_base_seconds: float = BACKEND_RETRY_BASE_SECONDS):
+        self.breaker = breaker or CircuitBreaker()
+        self.stale = stale or StaleCache()
+        self.deadline_seconds = deadline_seconds
+        self.read_retries = read_retries
+        self.retry_base_seconds = retry_base_seconds
+
+    async def read(self, key: Tuple[Hashable, ...], func: Callable[..., Any], *args) -> Any:
+        deadline = time.monotonic() + self.deadline_seconds
+        for attempt in range(self.read_retries + 1):
+            if not self.breaker.allow():
+                return self._serve_stale(key)
+            try:
+                result = await self._attempt(deadline, func, *args)
+            except Exception as e:
+                if not is_backend_failure(e):
+                    raise
+                backoff = random.uniform(0, self.retry_base_seconds * 2 ** attempt)  # full jitter
+                if attempt == self.read_retries or time.monotonic() + backoff >= deadline:
+                    return self._serve_stale(key)
+                await asyncio.sleep(backoff)
+                continue
+            self.stale.put(key, result)
+            return result
+
+    async def write(self, func: Callable[..., Any], *args) -> Any:
+        if not self.breaker.allow():
+            raise HTTPException(status_code=503, detail="Service temporarily unavailable")
+        try:
+            return await self._attempt(time.monotonic() + self.deadline_seconds, func, *args)
+        except Exception as e:
+            if not is_backend_failure(e):
+                raise
+            raise HTTPException(status_code=503, detail="Service temporarily unavailable")
+
+    def forget(self, user_id: Optional[str]):
+        """Drop stale fallbacks for a user after they write"""
+        self.stale.forget(user_id)
+
+    async def _attempt(self, deadline: float, func: Callable[..., Any], *args) -> Any:
+        """One call with its outcome recorded on the breaker"""
+        try:
+            result = await self._call(deadline, func, *args)
+        except Exception as e:
+            if is_backend_failure(e):
+                self.breaker.record_failure()
+            else:
+                # The backend answered (e.g. a 404) - that isn't an outage
+                self.breaker.record_success()
+            raise
+        finally:
+            # A cancelled call records neither outcome - never leave the breaker stuck half-open
+            self.breaker.release_trial()
+        self.breaker.record_success()
+        return result
+
+    async def _call(self, deadline: float, func: Callable[..., Any], *args) -> Any:
+        @functools.wraps(func)
+        def guarded():
+            # Skip calls that waited in the backend queue past their deadline
+            if time.monotonic() >= deadline:
+                raise DeadlineExceeded()
+            return func(*args)
+
+        try:
+            return await asyncio.wait_for(run_backend(guarded), max(deadline - time.monotonic(), 0))
+        except asyncio.TimeoutError:
+            raise DeadlineExceeded()
+
+    def _serve_stale(self, key: Tuple[Hashable, ...]) -> Any:
+        cached = self.stale.get(key)
+        if cached is None:
+            raise HTTPException(status_code=503, detail="Service temporarily unavailable")
+        if isinstance(cached, dict):
+            return {**cached, "stale": True}
+        return cached
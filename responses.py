@@ -0,0 +1,203 @@
+import functools
+import inspect
+import zlib
+from typing import Any, Optional
+
+import orjson
+from fastapi.datastructures import DefaultPlaceholder
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from fastapi.routing import APIRoute
+from starlette.datastructures import Headers, MutableHeaders
+
+try:
+    import brotli
+except ImportError:  # brotli is optional, gzip is always available
+    brotli = None
+
+ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS
+
+def dump_json(content: Any) -> bytes:
+    """Serialize with orjson, only walking the data with jsonable_encoder if orjson can't handle it."""
+    try:
+        return orjson.dumps(content, option=ORJSON_OPTIONS)
+    except TypeError:
+        # Pydantic models, sets, custom objects etc. - normalise first
+        return orjson.dumps(jsonable_encoder(content), option=ORJSON_OPTIONS)
+
+class FastJSONResponse(JSONResponse):
+    """JSON response rendered with orjson instead of the stdlib json module."""
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dump_json(content)
+
+class FastJSONRoute(APIRoute):
+    """Route that hands plain dict/list results straight to FastJSONResponse.
+
+    FastAPI normally runs jsonable_encoder over every return value before rendering.
+    Our endpoints return plain Supabase rows, so that walk is wasted work. Routes with
+    a response model, return annotation or custom status code keep the default path.
+    """
+
+    def __init__(self, path: str, endpoint, **kwargs):
+        if _can_bypass_encoder(endpoint, kwargs):
+            endpoint = _wrap_endpoint(endpoint)
+        super().__init__(path, endpoint, **kwargs)
+
+def _can_bypass_encoder(endpoint, kwargs) -> bool:
+    response_model = kwargs.get("response_model")
+    if isinstance(response_model, DefaultPlaceholder):
+        response_model = response_model.value
+    if response_model is not None or kwargs.get("status_code") is not None:
+        return False
+    return inspect.signature(endpoint).return_annotation is inspect.Signature.empty
+
+def _wrap_endpoint(endpoint):
+    if inspect.iscoroutinefunction(endpoint):
+        @functools.wraps(endpoint)
+        async def async_wrapper(*args, **kwargs):
+            return _to_response(await endpoint(*args, **kwargs))
+        return async_wrapper
+
+    @functools.wraps(endpoint)
+    def sync_wrapper(*args, **kwargs):
+        return _to_response(endpoint(*args, **kwargs))
+    return sync_wrapper
+
+def _to_response(result: Any) -> Any:
+    if isinstance(result, (dict, list)):
+        return FastJSONResponse(result)
+    return result
+
+# Response compression
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """Pick the best supported content-coding from an Accept-Encoding header."""
+    accepted = {}
+    for part in accept_encoding.lower().split(","):
+        token, _, params = part.strip().partition(";")
+        if not token:
+            continue
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[token.strip()] = quality
+
+    wildcard = accepted.get("*", 0.0)
+    if brotli is not None and accepted.get("br", wildcard) > 0:
+        return "br"
+    if accepted.get("gzip", wildcard) > 0:
+        return "gzip"
+    return None
+
+class _Compressor:
+    def __init__(self, encoding: str, gzip_level: int, brotli_quality: int):
+        if encoding == "br":
+            self._compressor = brotli.Compressor(quality=brotli_quality)
+            self._compress = self._compressor.process
+            self._flush = self._compressor.finish
+        else:
+            # wbits=31 -> gzip container
+            self._compressor = zlib.compressobj(gzip_level, zlib.DEFLATED, 31)
+            self._compress = self._compressor.compress
+            self._flush = self._compressor.flush
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compress(data)
+
+    def finish(self) -> bytes:
+        return self._flush()
+
+class CompressionMiddleware:
+    """Negotiated brotli/gzip compression for responses above a size threshold.
+
+    Event streams and responses that already carry a Content-Encoding are passed through.
+    """
+
+    def __init__(self, app, minimum_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 4):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        responder = _CompressionResponder(self, encoding, send)
+        await self.app(scope, receive, responder.send)
+
+class _CompressionResponder:
+    def __init__(self, middleware: CompressionMiddleware, encoding: str, send):
+        self.middleware = middleware
+        self.encoding = encoding
+        self.downstream = send
+        self.start_message = None
+        self.compressor: Optional[_Compressor] = None
+        self.passthrough = False
+
+    def _new_compressor(self) -> _Compressor:
+        return _Compressor(self.encoding, self.middleware.gzip_level, self.middleware.brotli_quality)
+
+    async def send(self, message):
+        message_type = message["type"]
+        if message_type == "http.response.start":
+            headers = Headers(raw=message["headers"])
+            content_type = headers.get("content-type", "")
+            self.passthrough = (
+                "content-encoding" in headers
+                or content_type.startswith("text/event-stream")
+            )
+            if self.passthrough:
+                await self.downstream(message)
+            else:
+                # Hold the start message until we know whether the body is worth compressing
+                self.start_message = message
+            return
+
+        if message_type != "http.response.body" or self.passthrough:
+            await self.downstream(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.start_message is not None:
+            start_message, self.start_message = self.start_message, None
+            headers = MutableHeaders(raw=start_message["headers"])
+            if not more_body and len(body) < self.middleware.minimum_size:
+                self.passthrough = True
+                await self.downstream(start_message)
+                await self.downstream(message)
+                return
+
+            self.compressor = self._new_compressor()
+            headers["Content-Encoding"] = self.encoding
+            headers.add_vary_header("Accept-Encoding")
+            if more_body:
+                # Streaming body - final length is unknown
+                del headers["Content-Length"]
+                await self.downstream(start_message)
+                await self.downstream({"type": "http.response.body", "body": self.compressor.compress(body), "more_body": True})
+                return
+
+            compressed = self.compressor.compress(body) + self.compressor.finish()
+            headers["Content-Length"] = str(len(compressed))
+            await self.downstream(start_message)
+            await self.downstream({"type": "http.response.body", "body": compressed})
+            return
+
+        chunk = self.compressor.compress(body)
+        if not more_body:
+            chunk += self.compressor.finish()
+        await self.downstream({"type": "http.response.body", "body": chunk, "more_body": more_body})
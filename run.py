@@ -1,5 +1,79 @@
+import logging
+import sys
 import uvicorn
-from main import app
+from config import (
+    ENVIRONMENT, SERVER_HOST, SERVER_PORT, WEB_WORKERS, UVICORN_LOOP, UVICORN_HTTP,
+    KEEPALIVE_SECONDS, SOCKET_BACKLOG, GRACEFUL_TIMEOUT_SECONDS, WORKER_TIMEOUT_SECONDS, reset_backend_connections,
+)
+
+logger = logging.getLogger(__name__)
+
+def run_development():
+    """Single uvicorn process"""
+    from main import app
+    uvicorn.run(app, host=SERVER_HOST, port=SERVER_PORT)
+
+def run_production():
+    """Gunicorn master with WEB_WORKERS uvicorn workers.
+
+    The app and the exercise catalog are loaded once in the master and shared with
+    the forked workers. SIGTERM drains in-flight requests for up to GRACEFUL_TIMEOUT_SECONDS.
+    """
+    from gunicorn.app.base import BaseApplication
+    from uvicorn_worker import UvicornWorker
+    from main import app
+    from logs import setup_logging
+    from workouts import preload_exercise_catalog
+
+    def post_fork(server, worker):
+        reset_backend_connections()
+        # The master's log writer thread isn't inherited by the fork
+        setup_logging()
+
+    class TunedUvicornWorker(UvicornWorker):
+        CONFIG_KWARGS = {
+            "loop": UVICORN_LOOP,
+            "http": UVICORN_HTTP,
+            "timeout_graceful_shutdown": GRACEFUL_TIMEOUT_SECONDS,
+        }
+
+    class ProductionServer(BaseApplication):
+        def load_config(self):
+            settings = {
+                "bind": f"{SERVER_HOST}:{SERVER_PORT}",
+                "workers": WEB_WORKERS,
+                "worker_class": TunedUvicornWorker,
+                "preload_app": True,
+                "keepalive": KEEPALIVE_SECONDS,
+                "backlog": SOCKET_BACKLOG,
+                "graceful_timeout": GRACEFUL_TIMEOUT_SECONDS,
+                "timeout": WORKER_TIMEOUT_SECONDS,
+                "post_fork": post_fork,
+            }
+            for key, value in settings.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            return app
+
+    if WEB_WORKERS > 1:
+        logger.warning(
+            "Per-user caches are not shared between workers - writes on one worker aren't seen by the others",
+            extra={"workers": WEB_WORKERS}
+        )
+
+    try:
+        logger.info("Preloaded exercise catalog", extra={"exercises": preload_exercise_catalog()})
+    except Exception:
+        # Workers fill the cache lazily instead
+        logger.warning("Could not preload exercise catalog", exc_info=True)
+
+    ProductionServer().run()
 
 if __name__ == "__main__":
-    uvicorn.run(app, host="127.0.0.1", port=8003)
+    # python run.py [development|production] - defaults to ENVIRONMENT
+    mode = sys.argv[1] if len(sys.argv) > 1 else ENVIRONMENT
+    if mode == "production":
+        run_production()
+    else:
+        run_development()
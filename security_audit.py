@@ -2,60 +2,144 @@
 """
 Security Audit Script for Workout Tracker
 Run this script to check for common security issues before deployment.
+
+    python security_audit.py [--json] [--no-cache] [--workers N]
+
+The secret scan skips dependency and build directories and caches results by
+content hash, so repeat runs only rescan files that changed.
 """
 
+import argparse
+import hashlib
+import json
 import os
 import re
 import sys
-from pathlib import Path
+from bisect import bisect_right
+from concurrent.futures import ProcessPoolExecutor
+
+# (group name, pattern, description) - combined into one alternation so each file is scanned once
+SECRET_PATTERNS = [
+    ('api_key', r'api[_-]?key\s*[:=]\s*["\'][^"\']{10,}["\']', 'API Key'),
+    ('password', r'password\s*[:=]\s*["\'][^"\']{3,}["\']', 'Password'),
+    ('secret', r'secret\s*[:=]\s*["\'][^"\']{10,}["\']', 'Secret'),
+    ('token', r'token\s*[:=]\s*["\'][^"\']{10,}["\']', 'Token'),
+    ('openai_key', r'sk-[a-zA-Z0-9]{32,}', 'OpenAI API Key'),
+    ('jwt', r'eyJ[A-Za-z0-9-_]+\.eyJ[A-Za-z0-9-_]+\.[A-Za-z0-9-_.+/=]+', 'JWT Token'),
+]
+SECRET_REGEX = re.compile('|'.join(f'(?P<{group}>{pattern})' for group, pattern, _ in SECRET_PATTERNS), re.IGNORECASE)
+SECRET_NAMES = {group: name for group, _, name in SECRET_PATTERNS}
+
+SCANNED_SUFFIXES = ('.py',)
+EXCLUDED_DIRS = {
+    '.git', 'node_modules', 'dist', 'build', '__pycache__', '.venv', 'venv', 'env',
+    '.mypy_cache', '.pytest_cache', '.ruff_cache', '.tox', '.nox', 'test-workout-tracker',
+}
+
+CACHE_FILE = '.security_audit_cache.json'
+# Cached findings are only valid for the patterns that produced them
+CACHE_VERSION = hashlib.sha256(SECRET_REGEX.pattern.encode('utf-8')).hexdigest()[:16]
+
+# Below this many files to scan, starting worker processes costs more than it saves
+PARALLEL_MIN_FILES = 32
+
+def find_source_files(root='.'):
+    """Files to scan under root, pruning excluded directories instead of walking them"""
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = [name for name in dirnames if name not in EXCLUDED_DIRS and not name.endswith('.egg-info')]
+        for filename in filenames:
+            if filename.endswith(SCANNED_SUFFIXES):
+                yield os.path.relpath(os.path.join(dirpath, filename), root)
+
+def scan_content(content):
+    """Secret findings in a file's content as (line, pattern group) pairs"""
+    findings = []
+    line_starts = None
+    for match in SECRET_REGEX.finditer(content):
+        if line_starts is None:
+            # Built on the first match only - most files have none
+            line_starts = [0] + [newline.end() for newline in re.finditer('\n', content)]
+        findings.append((bisect_right(line_starts, match.start()), match.lastgroup))
+    return findings
+
+def scan_file(path, cached_hash=None):
+    """Hash a file and scan it unless the hash matches cached_hash.
+    
+    Returns (path, hash, findings or None if unchanged, error). Runs in worker processes.
+    """
+    try:
+        with open(path, 'rb') as f:
+            data = f.read()
+        digest = hashlib.sha256(data).hexdigest()
+        if digest == cached_hash:
+            return path, digest, None, None
+        return path, digest, scan_content(data.decode('utf-8')), None
+    except Exception as e:
+        return path, None, [], str(e)
+
+def load_cache(path=CACHE_FILE):
+    try:
+        with open(path, 'r') as f:
+            cache = json.load(f)
+        if cache.get('version') == CACHE_VERSION:
+            return cache['files']
+    except (OSError, ValueError, KeyError):
+        pass
+    return {}
 
-def check_secrets_in_code():
+def save_cache(files, path=CACHE_FILE):
+    try:
+        with open(path, 'w') as f:
+            json.dump({'version': CACHE_VERSION, 'files': files}, f)
+    except OSError:
+        pass  # The next run just rescans
+
+def check_secrets_in_code(use_cache=True, workers=None):
     """Check for hardcoded secrets in code files"""
-    print("🔍 Checking for hardcoded secrets...")
-    
-    secret_patterns = [
-        (r'api[_-]?key\s*[:=]\s*["\'][^"\']{10,}["\']', 'API Key'),
-        (r'password\s*[:=]\s*["\'][^"\']{3,}["\']', 'Password'),
-        (r'secret\s*[:=]\s*["\'][^"\']{10,}["\']', 'Secret'),
-        (r'token\s*[:=]\s*["\'][^"\']{10,}["\']', 'Token'),
-        (r'sk-[a-zA-Z0-9]{32,}', 'OpenAI API Key'),
-        (r'eyJ[A-Za-z0-9-_]+\.eyJ[A-Za-z0-9-_]+\.[A-Za-z0-9-_.+/=]+', 'JWT Token'),
-    ]
-    
-    issues = []
+    cache = load_cache() if use_cache else {}
+    files = {}
+    to_scan = []
+    
+    for path in find_source_files():
+        stat = os.stat(path)
+        entry = cache.get(path)
+        if entry and entry['mtime_ns'] == stat.st_mtime_ns and entry['size'] == stat.st_size:
+            files[path] = entry
+        else:
+            to_scan.append((path, entry['sha256'] if entry else None, stat))
+    
+    paths = [path for path, _, _ in to_scan]
+    cached_hashes = [cached_hash for _, cached_hash, _ in to_scan]
+    if len(to_scan) >= PARALLEL_MIN_FILES and workers != 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(scan_file, paths, cached_hashes, chunksize=16))
+    else:
+        results = [scan_file(path, cached_hash) for path, cached_hash in zip(paths, cached_hashes)]
     
-    for file_path in Path('.').rglob('*.py'):
-        if 'test-workout-tracker' in str(file_path) or '__pycache__' in str(file_path):
+    errors = []
+    for (path, digest, findings, error), (_, _, stat) in zip(results, to_scan):
+        if error:
+            errors.append(f"Could not read {path}: {error}")
             continue
-            
-        try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-                
-            for pattern, name in secret_patterns:
-                matches = re.finditer(pattern, content, re.IGNORECASE)
-                for match in matches:
-                    line_num = content[:match.start()].count('\n') + 1
-                    issues.append(f"  ⚠️  {file_path}:{line_num} - Potential {name} found")
-        except Exception as e:
-            print(f"  ⚠️  Could not read {file_path}: {e}")
-    
-    if issues:
-        print("❌ Potential secrets found:")
-        for issue in issues:
-            print(issue)
-        return False
-    else:
-        print("✅ No hardcoded secrets detected")
-        return True
+        if findings is None:
+            # Touched but unchanged - keep the cached findings
+            findings = cache[path]['findings']
+        files[path] = {'sha256': digest, 'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size, 'findings': findings}
+    
+    if use_cache:
+        save_cache(files)
+    
+    issues = [
+        {'file': path, 'line': line, 'type': SECRET_NAMES[group]}
+        for path in sorted(files)
+        for line, group in files[path]['findings']
+    ]
+    return issues, errors
 
 def check_env_file():
     """Check .env file configuration"""
-    print("\n🔍 Checking .env file...")
-    
     if not os.path.exists('.env'):
-        print("❌ .env file not found")
-        return False
+        return [".env file not found"], []
     
     required_vars = [
         'SUPABASE_PROJECT_URL',
@@ -72,65 +156,38 @@ def check_env_file():
     
     for var in required_vars:
         if var not in env_content:
-            issues.append(f"  ⚠️  Missing required variable: {var}")
+            issues.append(f"Missing required variable: {var}")
     
     # Check for production safety
     if 'ENVIRONMENT=production' in env_content and 'ENABLE_TEST_MODE=true' in env_content:
-        issues.append("  ⚠️  Test mode is enabled in production environment")
+        issues.append("Test mode is enabled in production environment")
     
-    if issues:
-        print("❌ .env file issues:")
-        for issue in issues:
-            print(issue)
-        return False
-    else:
-        print("✅ .env file looks good")
-        return True
+    return issues, []
 
 def check_gitignore():
     """Check .gitignore file"""
-    print("\n🔍 Checking .gitignore...")
-    
     if not os.path.exists('.gitignore'):
-        print("❌ .gitignore file not found")
-        return False
+        return [".gitignore file not found"], []
     
     required_entries = ['.env', '__pycache__/', '*.pyc', 'node_modules/']
     
     with open('.gitignore', 'r') as f:
         gitignore_content = f.read()
     
-    missing = []
-    for entry in required_entries:
-        if entry not in gitignore_content:
-            missing.append(entry)
-    
-    if missing:
-        print(f"❌ Missing .gitignore entries: {', '.join(missing)}")
-        return False
-    else:
-        print("✅ .gitignore looks good")
-        return True
+    return [f"Missing .gitignore entry: {entry}" for entry in required_entries if entry not in gitignore_content], []
 
 def check_dependencies():
     """Check for known vulnerable dependencies"""
-    print("\n🔍 Checking dependencies...")
-    
     if not os.path.exists('requirements.txt'):
-        print("❌ requirements.txt not found")
-        return False
+        return ["requirements.txt not found"], []
     
     # This is a basic check - in production, use tools like safety or pip-audit
-    print("✅ requirements.txt found (run 'pip install safety && safety check' for vulnerability scan)")
-    return True
+    return [], []
 
 def check_security_headers():
     """Check if security headers are implemented"""
-    print("\n🔍 Checking security headers implementation...")
-    
     if not os.path.exists('main.py'):
-        print("❌ main.py not found")
-        return False
+        return ["main.py not found"], []
     
     with open('main.py', 'r') as f:
         main_content = f.read()
@@ -142,73 +199,84 @@ def check_security_headers():
         'Strict-Transport-Security'
     ]
     
-    missing_headers = []
-    for header in security_headers:
-        if header not in main_content:
-            missing_headers.append(header)
-    
-    if missing_headers:
-        print(f"❌ Missing security headers: {', '.join(missing_headers)}")
-        return False
-    else:
-        print("✅ Security headers implemented")
-        return True
+    return [f"Missing security header: {header}" for header in security_headers if header not in main_content], []
 
 def check_input_validation():
     """Check for input validation implementation"""
-    print("\n🔍 Checking input validation...")
-    
     if not os.path.exists('main.py'):
-        print("❌ main.py not found")
-        return False
+        return ["main.py not found"], []
     
     with open('main.py', 'r') as f:
         main_content = f.read()
     
     validation_indicators = ['Field(', 'validator', 'min_length', 'max_length']
     
-    found_validation = any(indicator in main_content for indicator in validation_indicators)
-    
-    if found_validation:
-        print("✅ Input validation implemented")
-        return True
-    else:
-        print("❌ No input validation found")
-        return False
+    if any(indicator in main_content for indicator in validation_indicators):
+        return [], []
+    return ["No input validation found"], []
+
+# (name, heading, message when passed, check)
+CHECKS = [
+    ('secrets', "Checking for hardcoded secrets...", "No hardcoded secrets detected", check_secrets_in_code),
+    ('env_file', "Checking .env file...", ".env file looks good", check_env_file),
+    ('gitignore', "Checking .gitignore...", ".gitignore looks good", check_gitignore),
+    ('dependencies', "Checking dependencies...",
+     "requirements.txt found (run 'pip install safety && safety check' for vulnerability scan)", check_dependencies),
+    ('security_headers', "Checking security headers implementation...", "Security headers implemented", check_security_headers),
+    ('input_validation', "Checking input validation...", "Input validation implemented", check_input_validation),
+]
+
+def format_issue(issue):
+    if isinstance(issue, dict):
+        return f"{issue['file']}:{issue['line']} - Potential {issue['type']} found"
+    return issue
 
 def main():
     """Run all security checks"""
-    print("🛡️  Security Audit for Workout Tracker")
-    print("=" * 50)
-    
-    checks = [
-        check_secrets_in_code,
-        check_env_file,
-        check_gitignore,
-        check_dependencies,
-        check_security_headers,
-        check_input_validation
-    ]
+    parser = argparse.ArgumentParser(description="Security audit for Workout Tracker")
+    parser.add_argument('--json', action='store_true', help="print results as JSON")
+    parser.add_argument('--no-cache', action='store_true', help=f"rescan every file and don't write {CACHE_FILE}")
+    parser.add_argument('--workers', type=int, default=None, help="secret scan processes (default: CPU count)")
+    args = parser.parse_args()
+    
+    if not args.json:
+        print("🛡️  Security Audit for Workout Tracker")
+        print("=" * 50)
     
+    options = {'secrets': {'use_cache': not args.no_cache, 'workers': args.workers}}
     results = []
-    for check in checks:
+    for index, (name, heading, passed_message, check) in enumerate(CHECKS):
+        if not args.json:
+            print(("\n" if index else "") + f"🔍 {heading}")
         try:
-            result = check()
-            results.append(result)
+            issues, warnings = check(**options.get(name, {}))
         except Exception as e:
-            print(f"❌ Error running check: {e}")
-            results.append(False)
-    
-    print("\n" + "=" * 50)
-    passed = sum(results)
+            issues, warnings = [f"Error running check: {e}"], []
+        results.append({'name': name, 'passed': not issues, 'issues': issues, 'warnings': warnings})
+        
+        if not args.json:
+            for warning in warnings:
+                print(f"  ⚠️  {warning}")
+            if issues:
+                print("❌ Issues found:")
+                for issue in issues:
+                    print(f"  ⚠️  {format_issue(issue)}")
+            else:
+                print(f"✅ {passed_message}")
+    
+    passed = sum(result['passed'] for result in results)
     total = len(results)
     
-    if passed == total:
-        print(f"✅ All {total} security checks passed! Safe to deploy.")
-        sys.exit(0)
+    if args.json:
+        print(json.dumps({'passed': passed == total, 'checks': results}, indent=2))
     else:
-        print(f"❌ {total - passed} of {total} security checks failed. Please fix issues before deploying.")
-        sys.exit(1)
+        print("\n" + "=" * 50)
+        if passed == total:
+            print(f"✅ All {total} security checks passed! Safe to deploy.")
+        else:
+            print(f"❌ {total - passed} of {total} security checks failed. Please fix issues before deploying.")
+    
+    sys.exit(0 if passed == total else 1)
 
 if __name__ == "__main__":
     main()
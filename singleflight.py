@@ -0,0 +1,72 @@
+import asyncio
+import contextvars
+import functools
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+from logs import current_trace
+
+# The shared Supabase client carries per-user auth state (authenticate_user calls set_session),
+# so backend calls run one at a time on a dedicated thread: off the event loop, never interleaved.
+backend_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="backend")
+
+async def run_backend(func: Callable[..., Any], *args) -> Any:
+    """Run a blocking backend call on the backend thread and await its result.
+
+    The call runs in a copy of the caller's context, so its log records carry the
+    request's trace id, and its queueing and run time are added to the request trace.
+    """
+    loop = asyncio.get_running_loop()
+    trace = current_trace()
+    call = functools.partial(func, *args)
+    if trace is not None:
+        call = functools.partial(_timed, trace, time.perf_counter(), call)
+    return await loop.run_in_executor(backend_executor, contextvars.copy_context().run, call)
+
+def _timed(trace, submitted: float, call: Callable[[], Any]) -> Any:
+    started = time.perf_counter()
+    try:
+        return call()
+    finally:
+        name = getattr(call.func, "__name__", repr(call.func))
+        trace.record_backend_call(name, (started - submitted) * 1000, (time.perf_counter() - started) * 1000)
+
+class SingleFlight:
+    """Coalesce identical concurrent reads into one backend call.
+
+    Keys are tuples of (route, user_id, *params). The first caller for a key runs the
+    read on the backend thread; callers arriving while it is in flight await the same result.
+    Nothing is kept once the call finishes, so results are never staler than the read itself.
+    """
+
+    def __init__(self, runner: Optional[Callable[..., Awaitable[Any]]] = None):
+        # runner(key, func, *args) performs the shared call, e.g. ResilientBackend.read
+        self._runner = runner or (lambda key, func, *args: run_backend(func, *args))
+        self._calls: Dict[Tuple[Hashable, ...], asyncio.Task] = {}
+
+    async def do(self, key: Tuple[Hashable, ...], func: Callable[..., Any], *args) -> Any:
+        task = self._calls.get(key)
+        if task is None or task.done():
+            task = asyncio.ensure_future(self._runner(key, func, *args))
+            self._calls[key] = task
+            task.add_done_callback(lambda finished: self._finish(key, finished))
+        # Shield so one disconnecting client doesn't cancel the read for everyone else
+        return await asyncio.shield(task)
+
+    def forget(self, user_id: Optional[str]):
+        """Stop sharing in-flight reads for a user, e.g. after a write.
+
+        Reads started before the write may not see it, so later callers must start fresh.
+        """
+        for key in [key for key in self._calls if len(key) > 1 and key[1] == user_id]:
+            del self._calls[key]
+
+    def _finish(self, key: Tuple[Hashable, ...], task: asyncio.Task):
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        if not task.cancelled():
+            task.exception()  # mark as retrieved when every waiter has gone away
+
+    def __len__(self) -> int:
+        return len(self._calls)
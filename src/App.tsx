@@ -4,16 +4,12 @@ import AuthForm from './components/AuthForm';
 import SessionSelector from './components/SessionSelector';
 import ExerciseForm from './components/ExerciseForm';
 import SetList from './components/SetList';
-import { WorkoutSession } from './types';
+import { ExerciseSet, WorkoutSession } from './types';
 
 const App: React.FC = () => {
   const { user, isLoading, login, logout, isAuthenticated } = useAuth();
   const [currentSession, setCurrentSession] = useState<WorkoutSession | null>(null);
-  const [refreshTrigger, setRefreshTrigger] = useState(0);
-
-  const handleSetAdded = () => {
-    setRefreshTrigger(prev => prev + 1);
-  };
+  const [addedSet, setAddedSet] = useState<ExerciseSet | null>(null);
 
   if (isLoading) {
     return (
@@ -60,14 +56,14 @@ const App: React.FC = () => {
           sessionId={currentSession?.id || null}
           userId={user!.user_id}
           accessToken={user!.access_token}
-          onSetAdded={handleSetAdded}
+          onSetAdded={setAddedSet}
         />
 
         <SetList
           session={currentSession}
           userId={user!.user_id}
           accessToken={user!.access_token}
-          refreshTrigger={refreshTrigger}
+          addedSet={addedSet}
         />
       </div>
     </div>
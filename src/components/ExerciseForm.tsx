@@ -1,13 +1,16 @@
 import React, { useState, useEffect, useRef } from 'react';
 import { api } from '../utils/api';
-import { ExerciseSuggestion } from '../types';
+import { ExerciseSet, ExerciseSuggestion } from '../types';
 import { debounce } from '../utils/helpers';
+import { isCatalogLoaded, loadCatalog, searchCatalog } from '../utils/catalog';
+
+const LB_TO_KG = 0.45359237;
 
 interface ExerciseFormProps {
   sessionId: number | null;
   userId: string;
   accessToken: string;
-  onSetAdded: () => void;
+  onSetAdded: (set: ExerciseSet) => void;
 }
 
 const ExerciseForm: React.FC<ExerciseFormProps> = ({ sessionId, userId, accessToken, onSetAdded }) => {
@@ -18,22 +21,44 @@ const ExerciseForm: React.FC<ExerciseFormProps> = ({ sessionId, userId, accessTo
   const [showSuggestions, setShowSuggestions] = useState(false);
   const [isLoading, setIsLoading] = useState(false);
   const [selectedIndex, setSelectedIndex] = useState(-1);
+  const [lastSets, setLastSets] = useState<ExerciseSet[]>([]);
+  const [personalTop, setPersonalTop] = useState<string[]>([]);
   
   const exerciseInputRef = useRef<HTMLInputElement>(null);
   const suggestionsRef = useRef<HTMLDivElement>(null);
 
-  const debouncedSearch = debounce(async (query: string) => {
-    if (query.length > 1) {
-      try {
-        const response = await api.getExerciseSuggestions(query);
-        if (response.success && response.data) {
-          setSuggestions(response.data);
-          setShowSuggestions(true);
-          setSelectedIndex(-1);
-        }
-      } catch (error) {
-        console.error('Error fetching suggestions:', error);
+  useEffect(() => {
+    loadCatalog();
+  }, []);
+
+  const showLocalSuggestions = (query: string): boolean => {
+    // Zero round trips once the catalog is cached; short queries still ask the server for personal top exercises
+    if (query.trim().length < 2 || !isCatalogLoaded()) return false;
+    const results = searchCatalog(query.trim(), 10, personalTop);
+    if (results.length === 0) return false;
+    setSuggestions(results);
+    setShowSuggestions(true);
+    setSelectedIndex(-1);
+    return true;
+  };
+
+  const fetchSuggestions = async (query: string) => {
+    try {
+      const response = await api.getExerciseSuggestions(query, 10, userId, accessToken);
+      if (response.success && response.data) {
+        if (!query) setPersonalTop(response.data.map((suggestion: ExerciseSuggestion) => suggestion.name));
+        setSuggestions(response.data);
+        setShowSuggestions(true);
+        setSelectedIndex(-1);
       }
+    } catch (error) {
+      console.error('Error fetching suggestions:', error);
+    }
+  };
+
+  const debouncedSearch = debounce(async (query: string) => {
+    if (query.length > 0) {
+      await fetchSuggestions(query);
     } else {
       setSuggestions([]);
       setShowSuggestions(false);
@@ -41,6 +66,8 @@ const ExerciseForm: React.FC<ExerciseFormProps> = ({ sessionId, userId, accessTo
   }, 300);
 
   useEffect(() => {
+    // Local matches need no debounce - only fall back to the server RPC
+    if (showLocalSuggestions(exerciseName)) return;
     debouncedSearch(exerciseName);
   }, [exerciseName]);
 
@@ -85,10 +112,30 @@ const ExerciseForm: React.FC<ExerciseFormProps> = ({ sessionId, userId, accessTo
     }
   };
 
+  const loadLastPerformance = async (name: string) => {
+    try {
+      const response = await api.getLastPerformance(name, userId, accessToken);
+      if (response.success && response.data) {
+        const sets: ExerciseSet[] = response.data;
+        setLastSets(sets);
+        // Prefill with the most recent set unless the user already typed values.
+        // The form always submits kg, so a set logged in lbs is converted.
+        if (sets.length > 0) {
+          const weightKg = sets[0].is_kg ? sets[0].weight : Math.round(sets[0].weight * LB_TO_KG);
+          setReps(prev => prev || String(sets[0].reps));
+          setWeight(prev => prev || String(Math.max(weightKg, 1)));
+        }
+      }
+    } catch (error) {
+      console.error('Error loading last performance:', error);
+    }
+  };
+
   const selectSuggestion = (name: string) => {
     setExerciseName(name);
     setShowSuggestions(false);
     setSelectedIndex(-1);
+    loadLastPerformance(name);
   };
 
   const handleSubmit = async (e: React.FormEvent) => {
@@ -117,11 +164,13 @@ const ExerciseForm: React.FC<ExerciseFormProps> = ({ sessionId, userId, accessTo
     try {
       const response = await api.addSet(sessionId, exerciseName.trim(), repsNum, weightNum, true, userId, accessToken);
       
-      if (response.success) {
+      if (response.success && response.data) {
+        const addedSet: ExerciseSet = { ...response.data, exercise_name: exerciseName.trim() };
         setExerciseName('');
         setReps('');
         setWeight('');
-        onSetAdded();
+        setLastSets([]);
+        onSetAdded(addedSet);
       } else {
         alert(response.detail || 'Failed to add set');
       }
@@ -157,8 +206,15 @@ const ExerciseForm: React.FC<ExerciseFormProps> = ({ sessionId, userId, accessTo
               id="exercise"
               type="text"
               value={exerciseName}
-              onChange={(e) => setExerciseName(e.target.value)}
+              onChange={(e) => {
+                setExerciseName(e.target.value);
+                setLastSets([]);
+              }}
               onKeyDown={handleKeyDown}
+              onFocus={() => {
+                // Empty field - show the user's most used exercises
+                if (!exerciseName) fetchSuggestions('');
+              }}
               className="input"
               placeholder="Enter exercise name"
               autoComplete="off"
@@ -180,9 +236,11 @@ const ExerciseForm: React.FC<ExerciseFormProps> = ({ sessionId, userId, accessTo
                     }`}
                   >
                     <div className="font-medium text-gray-900">{suggestion.name}</div>
-                    <div className="text-xs text-gray-500">
-                      {Math.round(suggestion.similarity * 100)}% match
-                    </div>
+                    {suggestion.similarity !== undefined && (
+                      <div className="text-xs text-gray-500">
+                        {Math.round(suggestion.similarity * 100)}% match
+                      </div>
+                    )}
                   </button>
                 ))}
               </div>
@@ -232,6 +290,12 @@ const ExerciseForm: React.FC<ExerciseFormProps> = ({ sessionId, userId, accessTo
             </button>
           </div>
         </div>
+
+        {lastSets.length > 0 && (
+          <p className="text-sm text-gray-500">
+            Last time: {lastSets.map(set => `${set.reps} × ${set.weight}${set.is_kg ? 'kg' : 'lb'}`).join(', ')}
+          </p>
+        )}
       </form>
     </div>
   );
@@ -1,7 +1,9 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useCallback } from 'react';
 import { api } from '../utils/api';
-import { WorkoutSession } from '../types';
+import { CalendarDay, WorkoutSession } from '../types';
 import { formatDateTime, formatDisplayDate, formatDisplayTime } from '../utils/helpers';
+import { subscribeToSessionEvents } from '../utils/events';
+import VirtualList from './VirtualList';
 
 interface SessionSelectorProps {
   userId: string;
@@ -10,6 +12,9 @@ interface SessionSelectorProps {
   onSessionSelect: (session: WorkoutSession) => void;
 }
 
+const SESSION_ROW_HEIGHT = 80;
+const SESSION_LIST_MAX_HEIGHT = 320;
+
 const SessionSelector: React.FC<SessionSelectorProps> = ({
   userId,
   accessToken,
@@ -24,6 +29,10 @@ const SessionSelector: React.FC<SessionSelectorProps> = ({
   const [allSessions, setAllSessions] = useState<WorkoutSession[]>([]);
   const [showAllSessions, setShowAllSessions] = useState(false);
   const [isLoading, setIsLoading] = useState(false);
+  const [calendarDays, setCalendarDays] = useState<CalendarDay[]>([]);
+
+  const getSessionKey = useCallback((session: WorkoutSession) => session.id, []);
+  const getSessionRowHeight = useCallback(() => SESSION_ROW_HEIGHT, []);
 
   const loadSessionsForDate = async (date: string) => {
     try {
@@ -47,10 +56,45 @@ const SessionSelector: React.FC<SessionSelectorProps> = ({
     }
   };
 
+  const loadCalendar = async (month: string) => {
+    // month is YYYY-MM; one request covers every day of it
+    const [year, monthIndex] = month.split('-').map(Number);
+    const lastDay = new Date(year, monthIndex, 0).getDate();
+    try {
+      const response = await api.getCalendar(userId, accessToken, `${month}-01`, `${month}-${String(lastDay).padStart(2, '0')}`);
+      if (response.success && response.data) {
+        setCalendarDays(response.data);
+      }
+    } catch (error) {
+      console.error('Error loading calendar:', error);
+    }
+  };
+
+  const selectedMonth = workoutDate.slice(0, 7);
+  const workoutDays = calendarDays.filter(day => day.session_count > 0);
+
   useEffect(() => {
     loadSessionsForDate(workoutDate);
   }, [workoutDate, userId, accessToken]);
 
+  useEffect(() => {
+    loadCalendar(selectedMonth);
+  }, [selectedMonth, userId, accessToken]);
+
+  // Keep the session lists in sync with other devices
+  useEffect(() => {
+    return subscribeToSessionEvents(userId, accessToken, (event) => {
+      if (event.type === 'session.updated') {
+        const updated: WorkoutSession = event.data;
+        setSessions(prev => prev.map(s => s.id === updated.id ? { ...s, ...updated } : s));
+        setAllSessions(prev => prev.map(s => s.id === updated.id ? { ...s, ...updated } : s));
+      } else if (event.type === 'session.created' || event.type === 'resync') {
+        loadSessionsForDate(workoutDate);
+        loadCalendar(selectedMonth);
+      }
+    });
+  }, [userId, accessToken, workoutDate, selectedMonth]);
+
   const handleDateChange = (e: React.ChangeEvent<HTMLInputElement>) => {
     setWorkoutDate(e.target.value);
   };
@@ -63,6 +107,7 @@ const SessionSelector: React.FC<SessionSelectorProps> = ({
         const newSession = response.data;
         setSessions(prev => [...prev, newSession]);
         onSessionSelect(newSession);
+        loadCalendar(selectedMonth);
       } else {
         alert(response.detail || 'Failed to create session');
       }
@@ -78,30 +123,53 @@ const SessionSelector: React.FC<SessionSelectorProps> = ({
     loadAllSessions();
   };
 
-  const renameSession = async (sessionId: number, currentName: string) => {
-    const newName = prompt('Enter new session name:', currentName);
-    if (!newName || newName === currentName) return;
+  const renameSession = async (session: WorkoutSession) => {
+    const sessionId = session.id;
+    const newName = prompt('Enter new session name:', session.name);
+    if (!newName || newName === session.name) return;
 
     try {
-      const response = await api.renameSession(sessionId, newName, userId, accessToken);
+      const response = await api.renameSession(sessionId, newName, userId, accessToken, session.updated_at);
       if (response.success) {
+        const updatedAt = response.data?.updated_at ?? session.updated_at;
         setSessions(prev => prev.map(s => 
-          s.id === sessionId ? { ...s, name: newName } : s
+          s.id === sessionId ? { ...s, name: newName, updated_at: updatedAt } : s
         ));
         setAllSessions(prev => prev.map(s => 
-          s.id === sessionId ? { ...s, name: newName } : s
+          s.id === sessionId ? { ...s, name: newName, updated_at: updatedAt } : s
         ));
         if (currentSession?.id === sessionId) {
-          onSessionSelect({ ...currentSession, name: newName });
+          onSessionSelect({ ...currentSession, name: newName, updated_at: updatedAt });
         }
       } else {
         alert(response.detail || 'Failed to rename session');
+        loadSessionsForDate(workoutDate);
       }
     } catch (error) {
       alert('Error renaming session');
     }
   };
 
+  const repeatSession = async (session: WorkoutSession) => {
+    const increment = prompt(`Repeat "${session.name}" on the selected date.\nAdd weight to every set:`, '0');
+    if (increment === null) return;
+    const weightIncrement = parseInt(increment, 10) || 0;
+
+    try {
+      const response = await api.duplicateSession(session.id, workoutDate, userId, accessToken, 0, weightIncrement);
+      if (response.success && response.data) {
+        const newSession = response.data;
+        loadSessionsForDate(workoutDate);
+        onSessionSelect(newSession);
+        setShowAllSessions(false);
+      } else {
+        alert(response.detail || 'Failed to repeat session');
+      }
+    } catch (error) {
+      alert('Error repeating session');
+    }
+  };
+
   return (
     <>
       <div className="card p-6 mb-6">
@@ -140,6 +208,30 @@ const SessionSelector: React.FC<SessionSelectorProps> = ({
             </div>
           </div>
 
+          {workoutDays.length > 0 && (
+            <div>
+              <h3 className="text-sm font-medium text-gray-700 mb-2">
+                Workout days this month
+              </h3>
+              <div className="flex flex-wrap gap-2">
+                {workoutDays.map((day) => (
+                  <button
+                    key={day.date}
+                    onClick={() => setWorkoutDate(`${day.date}${workoutDate.slice(10)}`)}
+                    className={`px-2 py-1 rounded border text-sm ${
+                      workoutDate.startsWith(day.date)
+                        ? 'border-gray-900 bg-gray-50'
+                        : 'border-gray-200 hover:border-gray-300'
+                    }`}
+                    title={`${day.session_count} sessions, ${day.set_count} sets, ${day.volume} kg`}
+                  >
+                    {Number(day.date.slice(8))}
+                  </button>
+                ))}
+              </div>
+            </div>
+          )}
+
           {sessions.length > 0 && (
             <div>
               <h3 className="text-sm font-medium text-gray-700 mb-2">
@@ -172,7 +264,7 @@ const SessionSelector: React.FC<SessionSelectorProps> = ({
                         <button
                           onClick={(e) => {
                             e.stopPropagation();
-                            renameSession(session.id, session.name);
+                            renameSession(session);
                           }}
                           className="text-gray-400 hover:text-gray-600 p-1"
                           title="Rename session"
@@ -213,34 +305,53 @@ const SessionSelector: React.FC<SessionSelectorProps> = ({
               </button>
             </div>
             
-            <div className="p-6 overflow-y-auto max-h-80">
+            <div className="p-6">
               {allSessions.length > 0 ? (
-                <div className="space-y-3">
-                  {allSessions.map((session) => (
-                    <div
-                      key={session.id}
-                      className="p-3 border border-gray-200 rounded-lg hover:border-gray-300 cursor-pointer"
-                      onClick={() => {
-                        onSessionSelect(session);
-                        setShowAllSessions(false);
-                      }}
-                    >
-                      <div className="flex justify-between items-center">
-                        <div>
-                          <p className="font-medium text-gray-900">{session.name}</p>
-                          <p className="text-sm text-gray-500">
-                            {formatDisplayDate(session.created_at)} at {formatDisplayTime(session.created_at)}
-                          </p>
+                <VirtualList
+                  items={allSessions}
+                  getKey={getSessionKey}
+                  getHeight={getSessionRowHeight}
+                  maxHeight={SESSION_LIST_MAX_HEIGHT}
+                  renderItem={(session) => (
+                    <div className="pb-3 h-full">
+                      <div
+                        className="h-full p-3 border border-gray-200 rounded-lg hover:border-gray-300 cursor-pointer"
+                        onClick={() => {
+                          onSessionSelect(session);
+                          setShowAllSessions(false);
+                        }}
+                      >
+                        <div className="flex justify-between items-center">
+                          <div>
+                            <p className="font-medium text-gray-900">{session.name}</p>
+                            <p className="text-sm text-gray-500">
+                              {formatDisplayDate(session.created_at)} at {formatDisplayTime(session.created_at)}
+                            </p>
+                          </div>
+                          <div className="flex items-center gap-2">
+                            {session.set_count !== undefined && (
+                              <span className="text-sm text-gray-500">
+                                {session.set_count} sets
+                              </span>
+                            )}
+                            {!!session.set_count && (
+                              <button
+                                onClick={(e) => {
+                                  e.stopPropagation();
+                                  repeatSession(session);
+                                }}
+                                className="text-gray-400 hover:text-gray-600 p-1"
+                                title="Repeat session on selected date"
+                              >
+                                🔁
+                              </button>
+                            )}
+                          </div>
                         </div>
-                        {session.set_count !== undefined && (
-                          <span className="text-sm text-gray-500">
-                            {session.set_count} sets
-                          </span>
-                        )}
                       </div>
                     </div>
-                  ))}
-                </div>
+                  )}
+                />
               ) : (
                 <div className="text-center py-8">
                   <p className="text-gray-500">No sessions found</p>
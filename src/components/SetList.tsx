@@ -1,16 +1,128 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useMemo, useCallback } from 'react';
 import { api } from '../utils/api';
 import { ExerciseSet, WorkoutSession } from '../types';
 import { formatDisplayTime } from '../utils/helpers';
+import { subscribeToSessionEvents } from '../utils/events';
+import VirtualList from './VirtualList';
 
 interface SetListProps {
   session: WorkoutSession | null;
   userId: string;
   accessToken: string;
-  refreshTrigger: number;
+  addedSet: ExerciseSet | null;
 }
 
-const SetList: React.FC<SetListProps> = ({ session, userId, accessToken, refreshTrigger }) => {
+interface ExerciseGroup {
+  exerciseName: string;
+  sets: ExerciseSet[];
+  totalReps: number;
+  volume: number;
+}
+
+type Row =
+  | { kind: 'header'; group: ExerciseGroup }
+  | { kind: 'set'; set: ExerciseSet; index: number };
+
+const HEADER_HEIGHT = 56;
+const SET_ROW_HEIGHT = 80;
+const LIST_MAX_HEIGHT = 640;
+
+// Local patches for rows returned by the API or pushed over the event stream
+const withAddedSet = (sets: ExerciseSet[], added: any): ExerciseSet[] => {
+  if (sets.some(set => set.id === added.id)) return sets;
+  // Duplicated sets carry no name - borrow it from a set of the same exercise
+  const exerciseName = added.exercise_name
+    ?? sets.find(set => String(set.exercise_id) === String(added.exercise_id))?.exercise_name
+    ?? String(added.exercise_id);
+  return [...sets, { ...added, exercise_name: exerciseName }];
+};
+
+const withUpdatedSet = (sets: ExerciseSet[], updated: any): ExerciseSet[] =>
+  sets.map(set => set.id === updated.id ? { ...set, ...updated, exercise_name: set.exercise_name } : set);
+
+const withoutSet = (sets: ExerciseSet[], setId: number): ExerciseSet[] =>
+  sets.filter(set => set.id !== setId);
+
+interface SetRowProps {
+  set: ExerciseSet;
+  index: number;
+  onDuplicate: (set: ExerciseSet) => void;
+  onEdit: (set: ExerciseSet) => void;
+  onRemove: (set: ExerciseSet) => void;
+}
+
+// Memoized so patching one set only re-renders that row
+const SetRow = React.memo(({ set, index, onDuplicate, onEdit, onRemove }: SetRowProps) => (
+  <div className="pb-2 h-full">
+    <div className="h-full flex items-center justify-between p-3 border border-gray-200 rounded-lg hover:border-gray-300 transition-colors">
+      <div className="flex items-center space-x-4">
+        <span className="text-sm font-medium text-gray-500 w-8">
+          #{index + 1}
+        </span>
+        <div className="flex items-center space-x-6">
+          <div className="text-center">
+            <p className="text-lg font-semibold text-gray-900">{set.reps}</p>
+            <p className="text-xs text-gray-500">reps</p>
+          </div>
+          <div className="text-center">
+            <p className="text-lg font-semibold text-gray-900">
+              {set.weight} {set.is_kg ? 'kg' : 'lbs'}
+            </p>
+            <p className="text-xs text-gray-500">weight</p>
+          </div>
+          <div className="text-center">
+            <p className="text-sm text-gray-500">
+              {formatDisplayTime(set.created_at)}
+            </p>
+          </div>
+        </div>
+      </div>
+
+      <div className="flex items-center space-x-2">
+        <button
+          onClick={() => onDuplicate(set)}
+          className="p-2 text-gray-400 hover:text-gray-600 hover:bg-gray-50 rounded"
+          title="Duplicate set"
+        >
+          <svg className="w-4 h-4" fill="none" stroke="currentColor" viewBox="0 0 24 24">
+            <path strokeLinecap="round" strokeLinejoin="round" strokeWidth="2" d="M8 16H6a2 2 0 01-2-2V6a2 2 0 012-2h8a2 2 0 012 2v2m-6 12h8a2 2 0 002-2v-8a2 2 0 00-2-2h-8a2 2 0 00-2 2v8a2 2 0 002 2z" />
+          </svg>
+        </button>
+
+        <button
+          onClick={() => onEdit(set)}
+          className="p-2 text-gray-400 hover:text-gray-600 hover:bg-gray-50 rounded"
+          title="Edit set"
+        >
+          <svg className="w-4 h-4" fill="none" stroke="currentColor" viewBox="0 0 24 24">
+            <path strokeLinecap="round" strokeLinejoin="round" strokeWidth="2" d="M11 5H6a2 2 0 00-2 2v11a2 2 0 002 2h11a2 2 0 002-2v-5m-1.414-9.414a2 2 0 112.828 2.828L11.828 15H9v-2.828l8.586-8.586z" />
+          </svg>
+        </button>
+
+        <button
+          onClick={() => onRemove(set)}
+          className="p-2 text-red-400 hover:text-red-600 hover:bg-red-50 rounded"
+          title="Remove set"
+        >
+          <svg className="w-4 h-4" fill="none" stroke="currentColor" viewBox="0 0 24 24">
+            <path strokeLinecap="round" strokeLinejoin="round" strokeWidth="2" d="M19 7l-.867 12.142A2 2 0 0116.138 21H7.862a2 2 0 01-1.995-1.858L5 7m5 4v6m4-6v6m1-10V4a1 1 0 00-1-1h-4a1 1 0 00-1 1v3M4 7h16" />
+          </svg>
+        </button>
+      </div>
+    </div>
+  </div>
+));
+
+const GroupHeader = React.memo(({ group }: { group: ExerciseGroup }) => (
+  <div className="h-full flex items-end justify-between pb-2 mb-3 border-b border-gray-200">
+    <h3 className="font-medium text-gray-900">{group.exerciseName}</h3>
+    <span className="text-sm text-gray-500">
+      {group.sets.length} sets · {group.totalReps} reps · {Math.round(group.volume)} volume
+    </span>
+  </div>
+));
+
+const SetList: React.FC<SetListProps> = ({ session, userId, accessToken, addedSet }) => {
   const [sets, setSets] = useState<ExerciseSet[]>([]);
   const [isLoading, setIsLoading] = useState(false);
 
@@ -35,26 +147,54 @@ const SetList: React.FC<SetListProps> = ({ session, userId, accessToken, refresh
 
   useEffect(() => {
     loadSets();
-  }, [session, refreshTrigger]);
+  }, [session?.id]);
 
-  const duplicateSet = async (setId: number) => {
+  // Sets added from ExerciseForm are patched in - no refetch
+  useEffect(() => {
+    if (addedSet && addedSet.session_id === session?.id) {
+      setSets(prev => withAddedSet(prev, addedSet));
+    }
+  }, [addedSet]);
+
+  // Apply changes made on other devices as deltas instead of polling
+  useEffect(() => {
+    if (!session) return;
+
+    return subscribeToSessionEvents(userId, accessToken, (event) => {
+      if (event.type === 'resync') {
+        loadSets();
+        return;
+      }
+      if (!event.type.startsWith('set.') || event.data.session_id !== session.id) return;
+
+      if (event.type === 'set.removed') {
+        setSets(prev => withoutSet(prev, event.data.id));
+      } else if (event.type === 'set.updated') {
+        setSets(prev => withUpdatedSet(prev, event.data));
+      } else {
+        setSets(prev => withAddedSet(prev, event.data));
+      }
+    });
+  }, [session?.id, userId, accessToken]);
+
+  const duplicateSet = useCallback(async (set: ExerciseSet) => {
     try {
-      const response = await api.duplicateSet(setId, userId, accessToken);
-      if (response.success) {
-        loadSets(); // Refresh the list
+      const response = await api.duplicateSet(set.id, userId, accessToken);
+      if (response.success && response.data) {
+        setSets(prev => withAddedSet(prev, { ...response.data, exercise_name: set.exercise_name }));
       } else {
         alert(response.detail || 'Failed to duplicate set');
       }
     } catch (error) {
       alert('Error duplicating set');
     }
-  };
+  }, [userId, accessToken]);
 
-  const editSet = async (setId: number, currentReps: number, currentWeight: number) => {
-    const newReps = prompt('Enter new reps:', currentReps.toString());
+  const editSet = useCallback(async (set: ExerciseSet) => {
+    const newReps = prompt('Enter new reps:', set.reps.toString());
     if (newReps === null) return;
 
-    const newWeight = prompt('Enter new weight:', currentWeight.toString());
+    const newWeight = prompt('Enter new weight:', set.weight.toString());
     if (newWeight === null) return;
 
     const reps = parseInt(newReps);
@@ -66,42 +206,64 @@ const SetList: React.FC<SetListProps> = ({ session, userId, accessToken, refresh
     }
 
     try {
-      const response = await api.editSet(setId, reps, weight, userId, accessToken);
-      if (response.success) {
-        loadSets(); // Refresh the list
+      const response = await api.editSet(set.id, reps, weight, userId, accessToken, set.updated_at);
+      if (response.success && response.data) {
+        setSets(prev => withUpdatedSet(prev, response.data));
       } else {
         alert(response.detail || 'Failed to edit set');
+        loadSets(); // May have been changed on another device
       }
     } catch (error) {
       alert('Error editing set');
     }
-  };
+  }, [userId, accessToken, session?.id]);
 
-  const removeSet = async (setId: number) => {
+  const removeSet = useCallback(async (set: ExerciseSet) => {
     if (!confirm('Are you sure you want to remove this set?')) {
       return;
     }
 
     try {
-      const response = await api.removeSet(setId, userId, accessToken);
+      const response = await api.removeSet(set.id, userId, accessToken, set.updated_at);
       if (response.success) {
-        loadSets(); // Refresh the list
+        setSets(prev => withoutSet(prev, set.id));
       } else {
         alert(response.detail || 'Failed to remove set');
+        loadSets(); // May have been changed on another device
       }
     } catch (error) {
       alert('Error removing set');
     }
-  };
+  }, [userId, accessToken, session?.id]);
 
-  const groupedSets = sets.reduce((groups, set) => {
-    const exerciseName = set.exercise_name;
-    if (!groups[exerciseName]) {
-      groups[exerciseName] = [];
-    }
-    groups[exerciseName].push(set);
-    return groups;
-  }, {} as Record<string, ExerciseSet[]>);
+  // Group by exercise with per-group totals, recomputed only when the sets change
+  const rows = useMemo(() => {
+    const groups = new Map<string, ExerciseGroup>();
+    sets.forEach(set => {
+      let group = groups.get(set.exercise_name);
+      if (!group) {
+        group = { exerciseName: set.exercise_name, sets: [], totalReps: 0, volume: 0 };
+        groups.set(set.exercise_name, group);
+      }
+      group.sets.push(set);
+      group.totalReps += set.reps;
+      group.volume += set.reps * set.weight;
+    });
+
+    const result: Row[] = [];
+    groups.forEach(group => {
+      result.push({ kind: 'header', group });
+      group.sets.forEach((set, index) => result.push({ kind: 'set', set, index }));
+    });
+    return result;
+  }, [sets]);
+
+  const getRowKey = useCallback((row: Row) => row.kind === 'header' ? `header-${row.group.exerciseName}` : row.set.id, []);
+  const getRowHeight = useCallback((row: Row) => row.kind === 'header' ? HEADER_HEIGHT : SET_ROW_HEIGHT, []);
+  const renderRow = useCallback((row: Row) => row.kind === 'header'
+    ? <GroupHeader group={row.group} />
+    : <SetRow set={row.set} index={row.index} onDuplicate={duplicateSet} onEdit={editSet} onRemove={removeSet} />,
+  [duplicateSet, editSet, removeSet]);
 
   if (!session) {
     return (
@@ -130,79 +292,13 @@ const SetList: React.FC<SetListProps> = ({ session, userId, accessToken, refresh
           <p className="text-sm text-gray-400 mt-2">Add your first exercise set above</p>
         </div>
       ) : (
-        <div className="space-y-6">
-          {Object.entries(groupedSets).map(([exerciseName, exerciseSets]) => (
-            <div key={exerciseName}>
-              <h3 className="font-medium text-gray-900 mb-3 pb-2 border-b border-gray-200">
-                {exerciseName}
-              </h3>
-              
-              <div className="space-y-2">
-                {exerciseSets.map((set, index) => (
-                  <div
-                    key={set.id}
-                    className="flex items-center justify-between p-3 border border-gray-200 rounded-lg hover:border-gray-300 transition-colors"
-                  >
-                    <div className="flex items-center space-x-4">
-                      <span className="text-sm font-medium text-gray-500 w-8">
-                        #{index + 1}
-                      </span>
-                      <div className="flex items-center space-x-6">
-                        <div className="text-center">
-                          <p className="text-lg font-semibold text-gray-900">{set.reps}</p>
-                          <p className="text-xs text-gray-500">reps</p>
-                        </div>
-                        <div className="text-center">
-                          <p className="text-lg font-semibold text-gray-900">
-                            {set.weight} {set.is_kg ? 'kg' : 'lbs'}
-                          </p>
-                          <p className="text-xs text-gray-500">weight</p>
-                        </div>
-                        <div className="text-center">
-                          <p className="text-sm text-gray-500">
-                            {formatDisplayTime(set.created_at)}
-                          </p>
-                        </div>
-                      </div>
-                    </div>
-
-                    <div className="flex items-center space-x-2">
-                      <button
-                        onClick={() => duplicateSet(set.id)}
-                        className="p-2 text-gray-400 hover:text-gray-600 hover:bg-gray-50 rounded"
-                        title="Duplicate set"
-                      >
-                        <svg className="w-4 h-4" fill="none" stroke="currentColor" viewBox="0 0 24 24">
-                          <path strokeLinecap="round" strokeLinejoin="round" strokeWidth="2" d="M8 16H6a2 2 0 01-2-2V6a2 2 0 012-2h8a2 2 0 012 2v2m-6 12h8a2 2 0 002-2v-8a2 2 0 00-2-2h-8a2 2 0 00-2 2v8a2 2 0 002 2z" />
-                        </svg>
-                      </button>
-                      
-                      <button
-                        onClick={() => editSet(set.id, set.reps, set.weight)}
-                        className="p-2 text-gray-400 hover:text-gray-600 hover:bg-gray-50 rounded"
-                        title="Edit set"
-                      >
-                        <svg className="w-4 h-4" fill="none" stroke="currentColor" viewBox="0 0 24 24">
-                          <path strokeLinecap="round" strokeLinejoin="round" strokeWidth="2" d="M11 5H6a2 2 0 00-2 2v11a2 2 0 002 2h11a2 2 0 002-2v-5m-1.414-9.414a2 2 0 112.828 2.828L11.828 15H9v-2.828l8.586-8.586z" />
-                        </svg>
-                      </button>
-                      
-                      <button
-                        onClick={() => removeSet(set.id)}
-                        className="p-2 text-red-400 hover:text-red-600 hover:bg-red-50 rounded"
-                        title="Remove set"
-                      >
-                        <svg className="w-4 h-4" fill="none" stroke="currentColor" viewBox="0 0 24 24">
-                          <path strokeLinecap="round" strokeLinejoin="round" strokeWidth="2" d="M19 7l-.867 12.142A2 2 0 0116.138 21H7.862a2 2 0 01-1.995-1.858L5 7m5 4v6m4-6v6m1-10V4a1 1 0 00-1-1h-4a1 1 0 00-1 1v3M4 7h16" />
-                        </svg>
-                      </button>
-                    </div>
-                  </div>
-                ))}
-              </div>
-            </div>
-          ))}
-        </div>
+        <VirtualList
+          items={rows}
+          getKey={getRowKey}
+          getHeight={getRowHeight}
+          renderItem={renderRow}
+          maxHeight={LIST_MAX_HEIGHT}
+        />
       )}
     </div>
   );
@@ -0,0 +1,57 @@
+import React, { useMemo, useState } from 'react';
+
+interface VirtualListProps<T> {
+  items: T[];
+  getKey: (item: T) => React.Key;
+  getHeight: (item: T) => number;
+  renderItem: (item: T) => React.ReactNode;
+  maxHeight: number;
+  overscan?: number;
+}
+
+// Renders only the rows inside the scroll viewport (plus overscan) - rows must have the height getHeight reports
+function VirtualList<T>({ items, getKey, getHeight, renderItem, maxHeight, overscan = 4 }: VirtualListProps<T>) {
+  const [scrollTop, setScrollTop] = useState(0);
+
+  const offsets = useMemo(() => {
+    const result = [0];
+    items.forEach(item => result.push(result[result.length - 1] + getHeight(item)));
+    return result;
+  }, [items, getHeight]);
+
+  const totalHeight = offsets[offsets.length - 1];
+  const viewportHeight = Math.min(totalHeight, maxHeight);
+
+  // Binary search for the first row ending below the top of the viewport
+  let low = 0;
+  let high = items.length;
+  while (low < high) {
+    const mid = (low + high) >> 1;
+    if (offsets[mid + 1] <= scrollTop) low = mid + 1;
+    else high = mid;
+  }
+  const start = Math.max(0, low - overscan);
+  let end = low;
+  while (end < items.length && offsets[end] < scrollTop + viewportHeight) end++;
+  end = Math.min(items.length, end + overscan);
+
+  return (
+    <div
+      style={{ height: viewportHeight, overflowY: totalHeight > maxHeight ? 'auto' : 'visible' }}
+      onScroll={(e) => setScrollTop(e.currentTarget.scrollTop)}
+    >
+      <div style={{ height: totalHeight, position: 'relative' }}>
+        {items.slice(start, end).map((item, index) => (
+          <div
+            key={getKey(item)}
+            style={{ position: 'absolute', top: offsets[start + index], left: 0, right: 0, height: getHeight(item) }}
+          >
+            {renderItem(item)}
+          </div>
+        ))}
+      </div>
+    </div>
+  );
+}
+
+export default VirtualList;
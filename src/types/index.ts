@@ -9,21 +9,31 @@ export interface WorkoutSession {
   created_at: string;
   user_id: string;
   set_count?: number;
+  updated_at?: string | null;
 }
 
 export interface ExerciseSet {
   id: number;
   session_id: number;
+  exercise_id?: number | string;
   exercise_name: string;
   reps: number;
   weight: number;
   is_kg: boolean;
   created_at: string;
+  updated_at?: string | null;
+}
+
+export interface CalendarDay {
+  date: string;
+  session_count: number;
+  set_count: number;
+  volume: number;
 }
 
 export interface ExerciseSuggestion {
   name: string;
-  similarity: number;
+  similarity?: number;
 }
 
 export interface ApiResponse<T = any> {
@@ -32,6 +42,8 @@ export interface ApiResponse<T = any> {
   detail?: string;
   error?: string;
   message?: string;
+  changed?: boolean;
+  stale?: boolean;
   access_token?: string;
   user_id?: string;
 }
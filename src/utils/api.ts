@@ -1,4 +1,5 @@
 import { ApiResponse } from '../types';
+import { getTimeZone, withUtcOffset } from './helpers';
 
 export const api = {
   // Auth endpoints
@@ -30,8 +31,9 @@ export const api = {
   },
 
   // Exercise endpoints
-  getExerciseSuggestions: async (query: string, limit = 10): Promise<ApiResponse> => {
-    const response = await fetch(`/api/exercise-suggestions?query=${encodeURIComponent(query)}&limit=${limit}`);
+  getExerciseSuggestions: async (query: string, limit = 10, userId?: string, accessToken?: string): Promise<ApiResponse> => {
+    const userParams = userId && accessToken ? `&user_id=${userId}&access_token=${accessToken}` : '';
+    const response = await fetch(`/api/exercise-suggestions?query=${encodeURIComponent(query)}&limit=${limit}${userParams}`);
     return response.json();
   },
 
@@ -40,13 +42,23 @@ export const api = {
     const response = await fetch('/api/create-session', {
       method: 'POST',
       headers: { 'Content-Type': 'application/json' },
-      body: JSON.stringify({ user_id: userId, access_token: accessToken, workout_date: workoutDate })
+      body: JSON.stringify({ user_id: userId, access_token: accessToken, workout_date: withUtcOffset(workoutDate) })
     });
     return response.json();
   },
 
   getSessionsByDate: async (userId: string, accessToken: string, date: string): Promise<ApiResponse> => {
-    const response = await fetch(`/api/sessions-by-date?user_id=${userId}&access_token=${accessToken}&date=${date}`);
+    const response = await fetch(`/api/sessions-by-date?user_id=${userId}&access_token=${accessToken}&date=${date}&tz=${encodeURIComponent(getTimeZone())}`);
+    return response.json();
+  },
+
+  getCalendar: async (userId: string, accessToken: string, start: string, end: string): Promise<ApiResponse> => {
+    const response = await fetch(`/api/calendar?user_id=${userId}&access_token=${accessToken}&start=${start}&end=${end}&tz=${encodeURIComponent(getTimeZone())}`);
+    return response.json();
+  },
+
+  getWeeklySummary: async (userId: string, accessToken: string): Promise<ApiResponse> => {
+    const response = await fetch(`/api/weekly-summary?user_id=${userId}&access_token=${accessToken}`);
     return response.json();
   },
 
@@ -65,6 +77,11 @@ export const api = {
     return response.json();
   },
 
+  getLastPerformance: async (exerciseName: string, userId: string, accessToken: string): Promise<ApiResponse> => {
+    const response = await fetch(`/api/last-performance?exercise_name=${encodeURIComponent(exerciseName)}&user_id=${userId}&access_token=${accessToken}`);
+    return response.json();
+  },
+
   addSet: async (sessionId: number, exerciseName: string, reps: number, weight: number, isKg: boolean, userId: string, accessToken: string): Promise<ApiResponse> => {
     const response = await fetch('/api/add-set', {
       method: 'POST',
@@ -82,11 +99,11 @@ export const api = {
     return response.json();
   },
 
-  renameSession: async (sessionId: number, name: string, userId: string, accessToken: string): Promise<ApiResponse> => {
+  renameSession: async (sessionId: number, name: string, userId: string, accessToken: string, expectedUpdatedAt?: string | null): Promise<ApiResponse> => {
     const response = await fetch('/api/rename-session', {
       method: 'POST',
       headers: { 'Content-Type': 'application/json' },
-      body: JSON.stringify({ session_id: sessionId, name, user_id: userId, access_token: accessToken })
+      body: JSON.stringify({ session_id: sessionId, name, user_id: userId, access_token: accessToken, expected_updated_at: expectedUpdatedAt })
     });
     return response.json();
   },
@@ -100,20 +117,36 @@ export const api = {
     return response.json();
   },
 
-  editSet: async (setId: number, reps: number, weight: number, userId: string, accessToken: string): Promise<ApiResponse> => {
+  duplicateSession: async (sessionId: number, workoutDate: string, userId: string, accessToken: string, repsIncrement = 0, weightIncrement = 0): Promise<ApiResponse> => {
+    const response = await fetch('/api/duplicate-session', {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify({
+        session_id: sessionId,
+        workout_date: withUtcOffset(workoutDate),
+        reps_increment: repsIncrement,
+        weight_increment: weightIncrement,
+        user_id: userId,
+        access_token: accessToken
+      })
+    });
+    return response.json();
+  },
+
+  editSet: async (setId: number, reps: number, weight: number, userId: string, accessToken: string, expectedUpdatedAt?: string | null): Promise<ApiResponse> => {
     const response = await fetch('/api/edit-set', {
       method: 'POST',
       headers: { 'Content-Type': 'application/json' },
-      body: JSON.stringify({ set_id: setId, reps, weight, user_id: userId, access_token: accessToken })
+      body: JSON.stringify({ set_id: setId, reps, weight, user_id: userId, access_token: accessToken, expected_updated_at: expectedUpdatedAt })
     });
     return response.json();
   },
 
-  removeSet: async (setId: number, userId: string, accessToken: string): Promise<ApiResponse> => {
+  removeSet: async (setId: number, userId: string, accessToken: string, expectedUpdatedAt?: string | null): Promise<ApiResponse> => {
     const response = await fetch('/api/remove-set', {
       method: 'POST',
       headers: { 'Content-Type': 'application/json' },
-      body: JSON.stringify({ set_id: setId, user_id: userId, access_token: accessToken })
+      body: JSON.stringify({ set_id: setId, user_id: userId, access_token: accessToken, expected_updated_at: expectedUpdatedAt })
     });
     return response.json();
   }
@@ -0,0 +1,135 @@
+import { ExerciseSuggestion } from '../types';
+
+interface StoredCatalog {
+  version: string;
+  exercises: string[];
+}
+
+interface IndexedExercise {
+  name: string;
+  trigrams: Set<string>;
+}
+
+const DB_NAME = 'workout-tracker';
+const STORE_NAME = 'catalog';
+const CATALOG_KEY = 'exercises';
+
+let catalog: IndexedExercise[] | null = null;
+let loading: Promise<void> | null = null;
+
+// pg_trgm style trigrams: lowercase words padded with two leading spaces and one trailing
+export const trigrams = (text: string): Set<string> => {
+  const result = new Set<string>();
+  text.toLowerCase().split(/[^a-z0-9]+/).filter(Boolean).forEach(word => {
+    const padded = `  ${word} `;
+    for (let i = 0; i < padded.length - 2; i++) {
+      result.add(padded.slice(i, i + 3));
+    }
+  });
+  return result;
+};
+
+const similarity = (a: Set<string>, b: Set<string>): number => {
+  if (a.size === 0 || b.size === 0) return 0;
+  let shared = 0;
+  a.forEach(trigram => {
+    if (b.has(trigram)) shared++;
+  });
+  return shared / (a.size + b.size - shared);
+};
+
+const openDb = (): Promise<IDBDatabase> => new Promise((resolve, reject) => {
+  const request = indexedDB.open(DB_NAME, 1);
+  request.onupgradeneeded = () => request.result.createObjectStore(STORE_NAME);
+  request.onsuccess = () => resolve(request.result);
+  request.onerror = () => reject(request.error);
+});
+
+const readStored = async (): Promise<StoredCatalog | null> => {
+  const db = await openDb();
+  return new Promise((resolve, reject) => {
+    const request = db.transaction(STORE_NAME, 'readonly').objectStore(STORE_NAME).get(CATALOG_KEY);
+    request.onsuccess = () => resolve(request.result ?? null);
+    request.onerror = () => reject(request.error);
+  });
+};
+
+const writeStored = async (stored: StoredCatalog): Promise<void> => {
+  const db = await openDb();
+  return new Promise((resolve, reject) => {
+    const transaction = db.transaction(STORE_NAME, 'readwrite');
+    transaction.objectStore(STORE_NAME).put(stored, CATALOG_KEY);
+    transaction.oncomplete = () => resolve();
+    transaction.onerror = () => reject(transaction.error);
+  });
+};
+
+const setCatalog = (names: string[]) => {
+  catalog = names.map(name => ({ name, trigrams: trigrams(name) }));
+};
+
+const syncCatalog = async () => {
+  let stored: StoredCatalog | null = null;
+  try {
+    stored = await readStored();
+  } catch (error) {
+    console.error('Error reading cached catalog:', error);
+  }
+  if (stored) setCatalog(stored.exercises);
+
+  // Revalidate - 304 if unchanged, a delta if we know the version, otherwise the full list
+  const url = stored ? `/api/exercise-catalog?since=${stored.version}` : '/api/exercise-catalog';
+  const response = await fetch(url, { headers: stored ? { 'If-None-Match': `"${stored.version}"` } : {} });
+  if (response.status === 304 || !response.ok) return;
+
+  const data = await response.json();
+  if (!data.success) return;
+
+  let exercises: string[];
+  if (data.delta && stored) {
+    const removed = new Set<string>(data.delta.removed);
+    exercises = [...stored.exercises.filter(name => !removed.has(name)), ...data.delta.added];
+  } else if (data.exercises) {
+    exercises = data.exercises;
+  } else {
+    return;
+  }
+
+  setCatalog(exercises);
+  try {
+    await writeStored({ version: data.version, exercises });
+  } catch (error) {
+    console.error('Error caching catalog:', error);
+  }
+};
+
+export const loadCatalog = (): Promise<void> => {
+  if (!loading) {
+    loading = syncCatalog().catch(error => {
+      console.error('Error loading exercise catalog:', error);
+      loading = null; // retry on next call
+    });
+  }
+  return loading;
+};
+
+export const isCatalogLoaded = (): boolean => catalog !== null && catalog.length > 0;
+
+// Fuzzy search entirely in the browser; personalTop (most used first) nudges the user's own exercises up
+export const searchCatalog = (query: string, limit = 10, personalTop: string[] = []): ExerciseSuggestion[] => {
+  if (!catalog) return [];
+  const queryTrigrams = trigrams(query);
+  const queryLower = query.toLowerCase();
+  const personalBoost = new Map(personalTop.map((name, index) => [name, 0.5 * (1 - index / personalTop.length)]));
+
+  return catalog
+    .map(exercise => {
+      let score = similarity(queryTrigrams, exercise.trigrams);
+      if (exercise.name.toLowerCase().includes(queryLower)) score = Math.max(score, queryLower.length / exercise.name.length);
+      return { name: exercise.name, similarity: score, rank: score + (score > 0 ? personalBoost.get(exercise.name) ?? 0 : 0) };
+    })
+    .filter(result => result.similarity > 0)
+    .sort((a, b) => b.rank - a.rank)
+    .slice(0, limit)
+    .map(({ name, similarity }) => ({ name, similarity }));
+};
@@ -0,0 +1,51 @@
+export type SessionEventType =
+  | 'session.created'
+  | 'session.updated'
+  | 'set.added'
+  | 'set.updated'
+  | 'set.removed'
+  | 'resync';
+
+export interface SessionEvent<T = any> {
+  type: SessionEventType;
+  data: T;
+}
+
+type Listener = (event: SessionEvent) => void;
+
+const EVENT_TYPES: SessionEventType[] = ['session.created', 'session.updated', 'set.added', 'set.updated', 'set.removed', 'resync'];
+
+// One EventSource per signed-in user, shared by every subscribed component
+let source: EventSource | null = null;
+let sourceKey = '';
+const listeners = new Set<Listener>();
+
+const openSource = (userId: string, accessToken: string) => {
+  source?.close();
+  sourceKey = `${userId}:${accessToken}`;
+  source = new EventSource(`/api/events?user_id=${userId}&access_token=${accessToken}`);
+  EVENT_TYPES.forEach(type => {
+    source!.addEventListener(type, (message) => {
+      const event: SessionEvent = { type, data: JSON.parse((message as MessageEvent).data) };
+      listeners.forEach(listener => listener(event));
+    });
+  });
+  // Missed events while reconnecting - let components refetch
+  source.onopen = () => listeners.forEach(listener => listener({ type: 'resync', data: null }));
+};
+
+export const subscribeToSessionEvents = (userId: string, accessToken: string, listener: Listener): (() => void) => {
+  if (!source || sourceKey !== `${userId}:${accessToken}`) {
+    openSource(userId, accessToken);
+  }
+  listeners.add(listener);
+
+  return () => {
+    listeners.delete(listener);
+    if (listeners.size === 0) {
+      source?.close();
+      source = null;
+      sourceKey = '';
+    }
+  };
+};
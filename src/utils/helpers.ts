@@ -12,6 +12,18 @@ export const formatDateTime = (date: Date): string => {
   return `${year}-${month}-${day}T${hours}:${minutes}`;
 };
 
+// Local YYYY-MM-DDTHH:MM from a datetime-local input -> ISO string with the browser's UTC offset,
+// so the server stores the real instant instead of wall-clock time read as UTC
+export const withUtcOffset = (localDateTime: string): string => {
+  const offsetMinutes = -new Date(localDateTime).getTimezoneOffset();
+  const sign = offsetMinutes >= 0 ? '+' : '-';
+  const hours = String(Math.floor(Math.abs(offsetMinutes) / 60)).padStart(2, '0');
+  const minutes = String(Math.abs(offsetMinutes) % 60).padStart(2, '0');
+  return `${localDateTime.slice(0, 16)}:00${sign}${hours}:${minutes}`;
+};
+
+export const getTimeZone = (): string => Intl.DateTimeFormat().resolvedOptions().timeZone;
+
 export const formatDisplayDate = (dateString: string): string => {
   const date = new Date(dateString);
   return date.toLocaleDateString('en-US', {
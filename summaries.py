@@ -0,0 +1,78 @@
+import threading
+from collections import OrderedDict
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from config import SUMMARY_CACHE_SIZE
+
+def week_start(day: date) -> date:
+    """Monday of the (UTC) week containing day"""
+    return day - timedelta(days=day.weekday())
+
+class DirtyUsers:
+    """Users with writes since their weekly summary was last computed.
+
+    The latest access token is kept with each mark so the background job can
+    read the user's rows under row level security.
+    """
+
+    def __init__(self):
+        self._users: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def mark(self, user_id: str, access_token: str):
+        with self._lock:
+            self._users[user_id] = access_token
+
+    def drain(self) -> List[Tuple[str, str]]:
+        """Take every dirty user, clearing the set"""
+        with self._lock:
+            users, self._users = list(self._users.items()), {}
+        return users
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._users)
+
+class SummaryStore:
+    """Precomputed weekly summaries, one lookup per read.
+
+    Bounded LRU like the stale cache. A summary computed in an earlier week is treated
+    as missing, so the window and streak roll over even for users who haven't written.
+    """
+
+    def __init__(self, max_entries: int = SUMMARY_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._summaries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            summary = self._summaries.get(user_id)
+            if summary is None:
+                return None
+            if _computed_week(summary) != week_start(datetime.now(timezone.utc).date()):
+                del self._summaries[user_id]
+                return None
+            self._summaries.move_to_end(user_id)
+            return summary
+
+    def put(self, user_id: str, summary: Dict[str, Any]):
+        with self._lock:
+            self._summaries[user_id] = summary
+            self._summaries.move_to_end(user_id)
+            while len(self._summaries) > self.max_entries:
+                self._summaries.popitem(last=False)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._summaries)
+
+def _computed_week(summary: Dict[str, Any]) -> Optional[date]:
+    computed_at = datetime.fromisoformat(summary["computed_at"])
+    if computed_at.tzinfo is None:
+        computed_at = computed_at.replace(tzinfo=timezone.utc)
+    return week_start(computed_at.astimezone(timezone.utc).date())
+
+dirty_users = DirtyUsers()
+weekly_summaries = SummaryStore()
@@ -0,0 +1,8 @@
+import os
+import sys
+
+# config.py builds the Supabase client at import - these tests never reach the network
+os.environ.setdefault("SUPABASE_PROJECT_URL", "https://test.supabase.co")
+os.environ.setdefault("SUPABASE_ANON_PUBLIC_KEY", "test-anon-key")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,52 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from events import RESYNC_EVENT, EventHub, format_sse
+
+def test_published_events_reach_every_stream_of_the_user():
+    async def scenario():
+        hub = EventHub(max_queue=10)
+        first, second, other = hub.subscribe("user"), hub.subscribe("user"), hub.subscribe("other")
+        hub.publish("user", "set.added", {"id": 1})
+        await asyncio.sleep(0)
+        assert await first.get(1) == {"type": "set.added", "data": {"id": 1}}
+        assert await second.get(1) == {"type": "set.added", "data": {"id": 1}}
+        assert await other.get(0.01) is None
+
+    asyncio.run(scenario())
+
+def test_overflowing_stream_is_told_to_resync():
+    async def scenario():
+        hub = EventHub(max_queue=3)
+        subscription = hub.subscribe("user")
+        for set_id in range(4):
+            hub.publish("user", "set.added", {"id": set_id})
+        await asyncio.sleep(0)
+
+        # The backlog is dropped and replaced by a single resync
+        assert await subscription.get(1) == RESYNC_EVENT
+        assert await subscription.get(0.01) is None
+
+        hub.publish("user", "set.added", {"id": 4})
+        await asyncio.sleep(0)
+        assert await subscription.get(1) == {"type": "set.added", "data": {"id": 4}}
+
+    asyncio.run(scenario())
+
+def test_streams_per_user_are_capped():
+    async def scenario():
+        hub = EventHub(max_streams_per_user=1)
+        subscription = hub.subscribe("user")
+        with pytest.raises(HTTPException) as error:
+            hub.subscribe("user")
+        assert error.value.status_code == 429
+        subscription.close()
+        assert hub.subscriber_count("user") == 0
+        hub.subscribe("user")
+
+    asyncio.run(scenario())
+
+def test_format_sse():
+    assert format_sse({"type": "set.removed", "data": {"id": 1}}) == b'event: set.removed\ndata: {"id":1}\n\n'
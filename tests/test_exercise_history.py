@@ -0,0 +1,60 @@
+from exercise_history import ExerciseStats, LastPerformanceIndex
+
+def logged_set(set_id, exercise_id="7", user_id="user", reps=5):
+    return {"id": set_id, "user_id": user_id, "session_id": 1, "exercise_id": exercise_id,
+            "reps": reps, "weight": 100, "is_kg": True, "created_at": "2026-10-01T10:00:00+00:00"}
+
+def ids(sets):
+    return [row["id"] for row in sets]
+
+def test_unloaded_key_is_not_recorded():
+    index = LastPerformanceIndex(max_sets=3)
+    index.record(logged_set(1))
+    assert index.get("user", "7") is None
+
+def test_record_keeps_newest_sets_and_trims():
+    index = LastPerformanceIndex(max_sets=3)
+    index.load("user", 7, [logged_set(2), logged_set(1)])
+    for set_id in (3, 4):
+        index.record(logged_set(set_id))
+    assert ids(index.get("user", "7")) == [4, 3, 2]
+
+    # A trimmed set is no longer tracked, so removing it keeps the key
+    index.discard(1)
+    assert ids(index.get("user", "7")) == [4, 3, 2]
+
+def test_update_replaces_indexed_set():
+    index = LastPerformanceIndex()
+    index.load("user", "7", [logged_set(1)])
+    index.update(logged_set(1, reps=8))
+    assert index.get("user", "7")[0]["reps"] == 8
+
+def test_discard_drops_the_key_for_reload():
+    index = LastPerformanceIndex()
+    index.load("user", "7", [logged_set(2), logged_set(1)])
+    index.load("user", "8", [logged_set(3, exercise_id="8")])
+    index.discard(2)
+    assert index.get("user", "7") is None
+    assert ids(index.get("user", "8")) == [3]
+
+def test_index_is_bounded_and_expires():
+    index = LastPerformanceIndex(max_entries=2)
+    for exercise_id in ("1", "2", "3"):
+        index.load("user", exercise_id, [logged_set(int(exercise_id), exercise_id=exercise_id)])
+    assert len(index) == 2
+    assert index.get("user", "1") is None
+
+    expired = LastPerformanceIndex(max_age_seconds=-1)
+    expired.load("user", "7", [logged_set(1)])
+    assert expired.get("user", "7") is None
+
+def test_stats_are_bounded_and_expire():
+    stats = ExerciseStats(max_entries=1)
+    stats.load("a", [])
+    stats.load("b", [{"exercise_id": "7", "created_at": None, "exercise_name": "Squat"}])
+    assert not stats.is_loaded("a")
+    assert stats.scores("b") == {"Squat": 1.0}
+
+    expired = ExerciseStats(max_age_seconds=-1)
+    expired.load("user", [])
+    assert not expired.is_loaded("user")
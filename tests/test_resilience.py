@@ -0,0 +1,81 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+from fastapi import HTTPException
+
+from resilience import CircuitBreaker, ResilientBackend
+
+def make_backend(**breaker_options):
+    breaker = CircuitBreaker(failure_threshold=1, reset_seconds=breaker_options.get("reset_seconds", 0))
+    return ResilientBackend(breaker=breaker, read_retries=0, deadline_seconds=5)
+
+def ok():
+    return {"success": True}
+
+def unreachable():
+    raise httpx.ConnectError("backend down")
+
+def not_found():
+    raise HTTPException(status_code=404, detail="Session not found")
+
+def test_breaker_opens_after_threshold():
+    breaker = CircuitBreaker(failure_threshold=2, reset_seconds=60)
+    breaker.record_failure()
+    assert breaker.state == "closed"
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert not breaker.allow()
+
+def test_half_open_allows_a_single_trial():
+    breaker = CircuitBreaker(failure_threshold=1, reset_seconds=0)
+    breaker.record_failure()
+    assert breaker.state == "half-open"
+    assert breaker.allow()
+    assert not breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed"
+
+def test_backend_failure_is_served_as_503_and_opens_breaker():
+    backend = make_backend(reset_seconds=60)
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(backend.read(("route", "user"), unreachable))
+    assert error.value.status_code == 503
+    assert backend.breaker.state == "open"
+
+def test_application_error_in_trial_closes_breaker():
+    backend = make_backend()
+    with pytest.raises(HTTPException):
+        asyncio.run(backend.read(("route", "user"), unreachable))
+    assert backend.breaker.state == "half-open"
+
+    # The trial reaches the backend, which answers with a 404 - not an outage
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(backend.read(("route", "user"), not_found))
+    assert error.value.status_code == 404
+    assert backend.breaker.state == "closed"
+    assert asyncio.run(backend.read(("route", "user"), ok)) == {"success": True}
+    assert asyncio.run(backend.write(ok)) == {"success": True}
+
+def test_cancelled_trial_does_not_leave_breaker_stuck():
+    backend = make_backend()
+    with pytest.raises(HTTPException):
+        asyncio.run(backend.write(unreachable))
+
+    async def cancel_trial():
+        task = asyncio.ensure_future(backend.read(("route", "user"), lambda: time.sleep(0.2)))
+        await asyncio.sleep(0.05)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(cancel_trial())
+    assert not backend.breaker.trial_in_flight
+    assert asyncio.run(backend.read(("route", "user"), ok)) == {"success": True}
+
+def test_stale_response_served_while_backend_fails():
+    backend = make_backend(reset_seconds=60)
+    assert asyncio.run(backend.read(("route", "user"), ok)) == {"success": True}
+    backend.breaker.record_failure()
+    assert asyncio.run(backend.read(("route", "user"), ok)) == {"success": True, "stale": True}
@@ -0,0 +1,69 @@
+import asyncio
+import gzip
+
+import pytest
+
+import responses
+from responses import CompressionMiddleware, negotiate_encoding
+
+@pytest.mark.parametrize("accept_encoding, expected", [
+    ("", None),
+    ("identity", None),
+    ("gzip", "gzip"),
+    ("gzip, deflate", "gzip"),
+    ("GZIP;q=0.5", "gzip"),
+    ("gzip;q=0", None),
+    ("gzip;q=bogus", None),
+    ("*", "br"),
+    ("*;q=0, gzip", "gzip"),
+    ("br, gzip", "br"),
+    ("br;q=0, gzip", "gzip"),
+])
+def test_negotiate_encoding(accept_encoding, expected):
+    if responses.brotli is None and expected == "br":
+        expected = "gzip"
+    assert negotiate_encoding(accept_encoding) == expected
+
+def test_brotli_is_skipped_when_not_installed(monkeypatch):
+    monkeypatch.setattr(responses, "brotli", None)
+    assert negotiate_encoding("br, gzip") == "gzip"
+    assert negotiate_encoding("br") is None
+
+def respond(body: bytes, accept_encoding: str = "gzip", content_type: bytes = b"application/json", minimum_size: int = 100):
+    """Run one request through CompressionMiddleware, returning (headers, body) as sent"""
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200,
+                    "headers": [(b"content-type", content_type), (b"content-length", str(len(body)).encode())]})
+        await send({"type": "http.response.body", "body": body})
+
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {"type": "http", "headers": [(b"accept-encoding", accept_encoding.encode())]}
+    asyncio.run(CompressionMiddleware(app, minimum_size=minimum_size)(scope, None, send))
+    headers = {key.decode(): value.decode() for key, value in sent[0]["headers"]}
+    return headers, b"".join(message.get("body", b"") for message in sent[1:])
+
+def test_small_response_is_not_compressed():
+    headers, body = respond(b"x" * 99)
+    assert "content-encoding" not in headers
+    assert body == b"x" * 99
+
+def test_response_at_threshold_is_compressed():
+    headers, body = respond(b"x" * 100)
+    assert headers["content-encoding"] == "gzip"
+    assert headers["vary"] == "Accept-Encoding"
+    assert headers["content-length"] == str(len(body))
+    assert gzip.decompress(body) == b"x" * 100
+
+def test_event_stream_is_never_compressed():
+    headers, body = respond(b"x" * 1000, content_type=b"text/event-stream")
+    assert "content-encoding" not in headers
+    assert body == b"x" * 1000
+
+def test_no_acceptable_encoding_passes_through():
+    headers, body = respond(b"x" * 1000, accept_encoding="identity")
+    assert "content-encoding" not in headers
+    assert body == b"x" * 1000
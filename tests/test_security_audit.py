@@ -0,0 +1,19 @@
+from security_audit import scan_content
+
+def test_clean_content_has_no_findings():
+    assert scan_content("import os\nvalue = os.getenv('API_KEY')\n") == []
+
+def test_findings_report_one_based_line_numbers():
+    # Fixtures are split at the opening quote so the audit doesn't flag this file
+    content = (
+        'api_key = "' 'abcdefghijklmnop"\n'
+        '\n'
+        'def login():\n'
+        '    password = "' 'hunter22"\n'
+        'TOKEN: "' '0123456789abcdef"'
+    )
+    assert scan_content(content) == [(1, "api_key"), (4, "password"), (5, "token")]
+
+def test_several_findings_on_one_line():
+    content = 'first = 1\nsecret = "' '0123456789ab"; key = "sk-' + "a" * 32 + '"\n'
+    assert scan_content(content) == [(2, "secret"), (2, "openai_key")]
@@ -0,0 +1,74 @@
+import asyncio
+
+from singleflight import SingleFlight
+
+def counting_runner():
+    """Runner that counts backend calls and holds each one until released"""
+    calls = []
+    release = asyncio.Event()
+
+    async def runner(key, func, *args):
+        calls.append(key)
+        await release.wait()
+        return func(*args)
+
+    return runner, calls, release
+
+def test_concurrent_identical_reads_share_one_call():
+    async def scenario():
+        runner, calls, release = counting_runner()
+        flight = SingleFlight(runner)
+        waiters = [asyncio.ensure_future(flight.do(("sessions", "user"), lambda: {"success": True})) for _ in range(5)]
+        await asyncio.sleep(0)
+        assert len(flight) == 1
+        release.set()
+        results = await asyncio.gather(*waiters)
+        assert results == [{"success": True}] * 5
+        assert calls == [("sessions", "user")]
+        assert len(flight) == 0
+
+    asyncio.run(scenario())
+
+def test_different_keys_are_not_coalesced():
+    async def scenario():
+        runner, calls, release = counting_runner()
+        flight = SingleFlight(runner)
+        release.set()
+        await asyncio.gather(flight.do(("sessions", "a"), lambda: 1), flight.do(("sessions", "b"), lambda: 2))
+        assert calls == [("sessions", "a"), ("sessions", "b")]
+
+    asyncio.run(scenario())
+
+def test_forget_makes_later_reads_start_fresh():
+    async def scenario():
+        runner, calls, release = counting_runner()
+        flight = SingleFlight(runner)
+        before_write = asyncio.ensure_future(flight.do(("sessions", "user"), lambda: "old"))
+        other_user = asyncio.ensure_future(flight.do(("sessions", "other"), lambda: "other"))
+        await asyncio.sleep(0)
+
+        flight.forget("user")
+        after_write = asyncio.ensure_future(flight.do(("sessions", "user"), lambda: "new"))
+        await asyncio.sleep(0)
+        release.set()
+
+        assert await before_write == "old"
+        assert await after_write == "new"
+        assert await other_user == "other"
+        assert calls == [("sessions", "user"), ("sessions", "other"), ("sessions", "user")]
+
+    asyncio.run(scenario())
+
+def test_cancelled_waiter_does_not_cancel_shared_call():
+    async def scenario():
+        runner, calls, release = counting_runner()
+        flight = SingleFlight(runner)
+        leaving = asyncio.ensure_future(flight.do(("sessions", "user"), lambda: "result"))
+        staying = asyncio.ensure_future(flight.do(("sessions", "user"), lambda: "result"))
+        await asyncio.sleep(0)
+        leaving.cancel()
+        release.set()
+        assert await staying == "result"
+        assert len(calls) == 1
+
+    asyncio.run(scenario())
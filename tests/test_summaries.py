@@ -0,0 +1,28 @@
+from datetime import datetime, timedelta, timezone
+
+from summaries import SummaryStore
+
+def summary(computed_at: datetime):
+    return {"weeks": [], "streak_weeks": 0, "computed_at": computed_at.isoformat()}
+
+def test_summary_from_this_week_is_served():
+    store = SummaryStore()
+    stored = summary(datetime.now(timezone.utc))
+    store.put("user", stored)
+    assert store.get("user") is stored
+
+def test_summary_from_an_earlier_week_is_recomputed():
+    store = SummaryStore()
+    store.put("user", summary(datetime.now(timezone.utc) - timedelta(weeks=1)))
+    assert store.get("user") is None
+    assert len(store) == 0
+
+def test_store_evicts_least_recently_used():
+    store = SummaryStore(max_entries=2)
+    now = datetime.now(timezone.utc)
+    store.put("a", summary(now))
+    store.put("b", summary(now))
+    store.get("a")
+    store.put("c", summary(now))
+    assert store.get("b") is None
+    assert store.get("a") is not None and store.get("c") is not None
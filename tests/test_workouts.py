@@ -0,0 +1,156 @@
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+
+import workouts
+
+USER_ID = "00000000-0000-0000-0000-000000000001"
+TOKEN = "access"
+
+class FakeQuery:
+    """Chainable stand-in for a postgrest query; execute() asks the test's handler for the result"""
+
+    def __init__(self, table, handler):
+        self.table = table
+        self.handler = handler
+        self.operation = None
+        self.values = None
+        self.filters = []
+
+    def select(self, *columns):
+        self.operation = self.operation or "select"
+        return self
+
+    def update(self, values):
+        self.operation, self.values = "update", values
+        return self
+
+    def delete(self):
+        self.operation = "delete"
+        return self
+
+    def __getattr__(self, name):
+        # eq, neq, gte, lt, or_, order, ... - recorded, not evaluated
+        def add_filter(*args, **kwargs):
+            self.filters.append((name, *args))
+            return self
+        return add_filter
+
+    def execute(self):
+        return SimpleNamespace(data=self.handler(self))
+
+@pytest.fixture
+def backend(monkeypatch):
+    """Route supabase.table() to per-(table, operation) handlers and record every executed query"""
+    handlers = {}
+    executed = []
+
+    def handle(query):
+        executed.append(query)
+        return handlers[(query.table, query.operation)](query)
+
+    monkeypatch.setattr(workouts, "supabase", SimpleNamespace(table=lambda table: FakeQuery(table, handle)))
+    monkeypatch.setattr(workouts, "authenticate_user", lambda user_id, access_token: None)
+    monkeypatch.setattr(workouts, "_has_updated_at", None)
+    return SimpleNamespace(handlers=handlers, executed=executed)
+
+def stored_set(**fields):
+    return {"id": 1, "user_id": USER_ID, "exercise_id": "7", "reps": 5, "weight": 100, "is_kg": True,
+            "updated_at": "2026-10-01T10:00:00+00:00", **fields}
+
+def test_edit_returns_changed_row(backend):
+    backend.handlers[("session_sets", "update")] = lambda query: [stored_set(reps=6)]
+    result = workouts.edit_set(1, 6, 100, USER_ID, TOKEN, "2026-10-01T10:00:00+00:00")
+    assert result["changed"] is True
+    update = backend.executed[0]
+    assert "updated_at" in update.values
+    assert ("eq", "updated_at", "2026-10-01T10:00:00+00:00") in update.filters
+
+def test_edit_missing_set_is_404(backend):
+    backend.handlers[("session_sets", "update")] = lambda query: []
+    backend.handlers[("session_sets", "select")] = lambda query: []
+    with pytest.raises(HTTPException) as error:
+        workouts.edit_set(1, 6, 100, USER_ID, TOKEN, "2026-10-01T10:00:00+00:00")
+    assert error.value.status_code == 404
+
+def test_edit_modified_elsewhere_is_409(backend):
+    backend.handlers[("session_sets", "update")] = lambda query: []
+    backend.handlers[("session_sets", "select")] = lambda query: [stored_set(updated_at="2026-10-01T10:05:00+00:00")]
+    with pytest.raises(HTTPException) as error:
+        workouts.edit_set(1, 6, 100, USER_ID, TOKEN, "2026-10-01T10:00:00+00:00")
+    assert error.value.status_code == 409
+
+def test_edit_with_same_values_is_unchanged(backend):
+    backend.handlers[("session_sets", "update")] = lambda query: []
+    # Same instant written with a Z suffix still matches
+    backend.handlers[("session_sets", "select")] = lambda query: [stored_set(updated_at="2026-10-01T10:00:00Z")]
+    result = workouts.edit_set(1, 5, 100, USER_ID, TOKEN, "2026-10-01T10:00:00+00:00")
+    assert result == {"success": True, "data": stored_set(updated_at="2026-10-01T10:00:00Z"), "changed": False}
+
+def test_write_without_updated_at_column_falls_back(backend):
+    def update(query):
+        if "updated_at" in query.values:
+            raise Exception("column session_sets.updated_at does not exist")
+        return [{k: v for k, v in stored_set(reps=6).items() if k != "updated_at"}]
+    backend.handlers[("session_sets", "update")] = update
+
+    result = workouts.edit_set(1, 6, 100, USER_ID, TOKEN, "2026-10-01T10:00:00+00:00")
+    assert result["changed"] is True
+    assert workouts._has_updated_at is False
+    retried = backend.executed[-1]
+    assert retried.values == {"reps": 6, "weight": 100}
+    assert not any(name == "eq" and column == "updated_at" for name, column, *_ in retried.filters)
+
+    # Later writes go straight to the unstamped update
+    workouts.edit_set(1, 7, 100, USER_ID, TOKEN, "2026-10-01T10:00:00+00:00")
+    assert "updated_at" not in backend.executed[-1].values
+
+def test_unrelated_update_error_is_not_retried(backend):
+    def update(query):
+        raise Exception("new row violates row-level security policy")
+    backend.handlers[("session_sets", "update")] = update
+    with pytest.raises(HTTPException) as error:
+        workouts.edit_set(1, 6, 100, USER_ID, TOKEN)
+    assert error.value.status_code == 400
+    assert len(backend.executed) == 1
+    assert workouts._has_updated_at is None
+
+def test_calendar_buckets_sessions_by_local_day(backend):
+    backend.handlers[("workout_sessions", "select")] = lambda query: [
+        # 23:00 on Oct 1 in Tokyo
+        {"id": 1, "created_at": "2026-10-01T14:00:00+00:00", "session_sets": [{"reps": 10, "weight": 100, "is_kg": True}]},
+        # 08:00 on Oct 2 in Tokyo, stored without an offset
+        {"id": 2, "created_at": "2026-10-01T23:00:00", "session_sets": [{"reps": 10, "weight": 100, "is_kg": False}]},
+        {"id": 3, "created_at": "2026-10-02T01:00:00Z", "session_sets": []},
+    ]
+    result = workouts.get_calendar(USER_ID, TOKEN, "2026-10-01", "2026-10-03", "Asia/Tokyo")
+    days = {day["date"]: day for day in result["data"]}
+    assert list(days) == ["2026-10-01", "2026-10-02", "2026-10-03"]
+    assert days["2026-10-01"] == {"date": "2026-10-01", "session_count": 1, "set_count": 1, "volume": 1000.0}
+    assert days["2026-10-02"] == {"date": "2026-10-02", "session_count": 2, "set_count": 1, "volume": 453.6}
+    assert days["2026-10-03"]["session_count"] == 0
+
+    # Queried from local midnight Oct 1 to local midnight Oct 4, in UTC
+    filters = backend.executed[0].filters
+    assert ("gte", "created_at", "2026-09-30T15:00:00+00:00") in filters
+    assert ("lt", "created_at", "2026-10-03T15:00:00+00:00") in filters
+
+def test_sessions_by_date_uses_the_calendar_day_window(backend):
+    backend.handlers[("workout_sessions", "select")] = lambda query: []
+    workouts.get_sessions_by_date(USER_ID, TOKEN, "2026-10-01", "Asia/Tokyo")
+    filters = backend.executed[0].filters
+    assert ("gte", "created_at", "2026-09-30T15:00:00+00:00") in filters
+    assert ("lt", "created_at", "2026-10-01T15:00:00+00:00") in filters
+
+def test_calendar_rejects_unknown_timezone(backend):
+    with pytest.raises(HTTPException) as error:
+        workouts.get_calendar(USER_ID, TOKEN, "2026-10-01", "2026-10-31", "Mars/Olympus")
+    assert error.value.status_code == 400
+    assert error.value.detail == "Unknown timezone"
+
+def test_workout_date_offset_is_stored_as_utc():
+    workout_datetime = workouts._parse_workout_date("2026-10-01T23:00:00+09:00")
+    assert workout_datetime.astimezone(timezone.utc) == datetime(2026, 10, 1, 14, tzinfo=timezone.utc)
+    assert workouts._parse_workout_date("2026-10-01T23:00").tzinfo == timezone.utc
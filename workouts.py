@@ -1,52 +1,203 @@
+import logging
 from fastapi import HTTPException
-from config import supabase, ENABLE_TEST_MODE, TEST_USER_ID, TEST_ACCESS_TOKEN
-from datetime import datetime, timedelta
+from postgrest.exceptions import APIError
+from config import supabase, ENABLE_TEST_MODE, TEST_USER_ID, TEST_ACCESS_TOKEN, LAST_PERFORMANCE_SETS, SUMMARY_WEEKS, BACKEND_PAGE_SIZE
+from exercise_history import last_performance, exercise_stats
+from events import event_hub
+from summaries import dirty_users, weekly_summaries, week_start
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+logger = logging.getLogger(__name__)
+
+# Longest range the calendar endpoint aggregates in one request
+MAX_CALENDAR_DAYS = 62
+LB_TO_KG = 0.45359237
+
+# Exercise name -> dim_exercises id, the catalog rarely changes
+_exercise_ids = {}
+
+# Whether the tables have an updated_at column - None until the first conditional write finds out
+_has_updated_at: Optional[bool] = None
 
 def authenticate_user(user_id: str, access_token: str):
     """Authenticate user, with test mode bypass"""
     if ENABLE_TEST_MODE and user_id == TEST_USER_ID and access_token == TEST_ACCESS_TOKEN:
-        return  # Skip authentication for test mode (development only)
-    supabase.auth.set_session(access_token, "")
+        return None  # Skip authentication for test mode (development only)
+    return supabase.auth.set_session(access_token, "")
+
+def verify_user(user_id: str, access_token: str):
+    """Authenticate and check the token belongs to user_id.
+    
+    Row-level security only guards database reads. Per-user data served from memory
+    (indexes, stats, summaries, event streams) must be checked against the token owner.
+    """
+    if ENABLE_TEST_MODE and user_id == TEST_USER_ID and access_token == TEST_ACCESS_TOKEN:
+        return
+    # set_session fetches the token's user from Supabase auth, so the id is server-verified
+    response = authenticate_user(user_id, access_token)
+    if not response or not response.user or response.user.id != user_id:
+        raise HTTPException(status_code=403, detail="Access token does not belong to this user")
+
+def resolve_exercise_id(exercise_name: str):
+    """Get exercise ID, fallback to exercise name if not found"""
+    if exercise_name in _exercise_ids:
+        return _exercise_ids[exercise_name]
+    exercise_result = supabase.table("dim_exercises").select("id").eq("exercise", exercise_name).execute()
+    if not exercise_result.data:
+        return exercise_name  # not cached so a newly added catalog entry is picked up
+    _exercise_ids[exercise_name] = exercise_result.data[0]["id"]
+    return _exercise_ids[exercise_name]
+
+def select_all(build_query, page_size: int = BACKEND_PAGE_SIZE) -> list:
+    """Every row of a select, read page by page until a short page comes back.
+    
+    PostgREST silently truncates a response at its max-rows setting. build_query must
+    return a fresh, totally ordered query on each call so the pages don't overlap.
+    """
+    rows = []
+    while True:
+        page = build_query().range(len(rows), len(rows) + page_size - 1).execute().data or []
+        rows.extend(page)
+        if len(page) < page_size:
+            return rows
+
+def preload_exercise_catalog() -> int:
+    """Fill the exercise id cache from dim_exercises, e.g. once before forking workers"""
+    for ex in select_all(lambda: supabase.table("dim_exercises").select("id, exercise").order("id")):
+        _exercise_ids[ex["exercise"]] = ex["id"]
+    return len(_exercise_ids)
 
 def create_workout_session(user_id: str, access_token: str, workout_date: str):
     try:
         # Test mode - return mock data
         if ENABLE_TEST_MODE and user_id == TEST_USER_ID and access_token == TEST_ACCESS_TOKEN:
             # Parse the date and convert to ISO format for consistency
-            workout_datetime = datetime.fromisoformat(workout_date.replace('Z', '+00:00'))
+            workout_datetime = _parse_workout_date(workout_date)
             session_name = f"Workout {workout_datetime.strftime('%b %d, %Y at %I:%M %p')}"
             
             mock_session = {
                 "id": 9999,  # Use a high ID to avoid conflicts
                 "user_id": user_id,
                 "name": session_name,
-                "created_at": workout_datetime.isoformat(),
+                "created_at": workout_datetime.astimezone(timezone.utc).isoformat(),
                 "set_count": 0
             }
             return {"success": True, "data": mock_session}
         
         authenticate_user(user_id, access_token)
         
-        # Parse the date and convert to ISO format for Supabase
-        workout_datetime = datetime.fromisoformat(workout_date.replace('Z', '+00:00'))
+        session_data = _insert_session(user_id, workout_date)
+        session_data["set_count"] = 0  # New session has no sets
+        event_hub.publish(user_id, "session.created", session_data)
+        dirty_users.mark(user_id, access_token)
+        return {"success": True, "data": session_data}
+    except Exception as e:
+        raise HTTPException(status_code=400, detail="Failed to create session")
+
+def _parse_workout_date(workout_date: str) -> datetime:
+    """Client workout time with its UTC offset - a naive value is taken as UTC"""
+    workout_datetime = datetime.fromisoformat(workout_date.replace('Z', '+00:00'))
+    if workout_datetime.tzinfo is None:
+        workout_datetime = workout_datetime.replace(tzinfo=timezone.utc)
+    return workout_datetime
+
+def _zone(tz: str) -> ZoneInfo:
+    try:
+        return ZoneInfo(tz)
+    except (ZoneInfoNotFoundError, ValueError):
+        raise HTTPException(status_code=400, detail="Unknown timezone")
+
+def _local_day_range(first_day, last_day, zone: ZoneInfo):
+    """UTC bounds of [first_day, last_day] in zone - local midnight to local midnight, end exclusive"""
+    range_start = datetime.combine(first_day, datetime.min.time(), tzinfo=zone).astimezone(timezone.utc)
+    range_end = datetime.combine(last_day + timedelta(days=1), datetime.min.time(), tzinfo=zone).astimezone(timezone.utc)
+    return range_start, range_end
+
+def _insert_session(user_id: str, workout_date: str):
+    """Insert a new session named after its date and return the created row"""
+    workout_datetime = _parse_workout_date(workout_date)
+    
+    # Create a default name based on the client's local date and time
+    session_name = f"Workout {workout_datetime.strftime('%b %d, %Y at %I:%M %p')}"
+    
+    # Stored as the real UTC instant so calendar and day views can bucket it in any timezone
+    result = supabase.table("workout_sessions").insert({
+        "user_id": user_id,
+        "name": session_name,
+        "created_at": workout_datetime.astimezone(timezone.utc).isoformat()
+    }).execute()
+    
+    if not result.data:
+        raise HTTPException(status_code=400, detail="Failed to create session")
+    return result.data[0]
+
+def duplicate_workout_session(session_id: int, workout_date: str, user_id: str, access_token: str, reps_increment: int = 0, weight_increment: int = 0):
+    """Copy every set of a session into a new session, optionally progressing reps and weight"""
+    try:
+        # Test mode - return mock data
+        if ENABLE_TEST_MODE and user_id == TEST_USER_ID and access_token == TEST_ACCESS_TOKEN:
+            workout_datetime = _parse_workout_date(workout_date)
+            mock_session = {
+                "id": 9999,
+                "user_id": user_id,
+                "name": f"Workout {workout_datetime.strftime('%b %d, %Y at %I:%M %p')}",
+                "created_at": workout_datetime.astimezone(timezone.utc).isoformat(),
+                "set_count": 0
+            }
+            return {"success": True, "data": mock_session}
         
-        # Create a default name based on the date and time
-        session_name = f"Workout {workout_datetime.strftime('%b %d, %Y at %I:%M %p')}"
+        authenticate_user(user_id, access_token)
         
-        result = supabase.table("workout_sessions").insert({
-            "user_id": user_id,
-            "name": session_name,
-            "created_at": workout_datetime.isoformat()
-        }).execute()
+        # One bulk read of the template sets - user_id filter doubles as the ownership check
+        sets_result = supabase.table("session_sets").select("exercise_id, reps, weight, is_kg").eq("session_id", session_id).eq("user_id", user_id).order("created_at").order("id").execute()
+        if not sets_result.data:
+            raise HTTPException(status_code=404, detail="Session not found or has no sets")
         
-        if result.data:
-            session_data = result.data[0]
-            session_data["set_count"] = 0  # New session has no sets
-            return {"success": True, "data": session_data}
-        else:
-            raise HTTPException(status_code=400, detail="Failed to create session")
+        new_session = _insert_session(user_id, workout_date)
+        
+        # One multi-row insert for all copied sets, keeping reps/weight within the AddSetRequest bounds.
+        # DEFAULT now() would give every row the same created_at, so stamp them in template order.
+        copied_at = datetime.now(timezone.utc)
+        new_sets = [{
+            "session_id": new_session["id"],
+            "exercise_id": set_data["exercise_id"],
+            "reps": min(max(set_data["reps"] + reps_increment, 1), 1000),
+            "weight": min(max(set_data["weight"] + weight_increment, 1), 10000),
+            "is_kg": set_data["is_kg"],
+            "user_id": user_id,
+            "created_at": (copied_at + timedelta(milliseconds=index)).isoformat()
+        } for index, set_data in enumerate(sets_result.data)]
+        
+        try:
+            result = supabase.table("session_sets").insert(new_sets).execute()
+            if not result.data:
+                raise HTTPException(status_code=400, detail="Failed to copy sets")
+        except Exception:
+            # The session is already committed - remove it so a failed copy (and each retry) leaves no empty session
+            _discard_session(new_session["id"], user_id)
+            raise
+        
+        for new_set in result.data:
+            last_performance.record(new_set)
+            exercise_stats.record(user_id, new_set["exercise_id"], new_set.get("created_at"))
+        
+        new_session["set_count"] = len(result.data)
+        event_hub.publish(user_id, "session.created", new_session)
+        dirty_users.mark(user_id, access_token)
+        return {"success": True, "data": new_session}
+    except HTTPException:
+        raise
     except Exception as e:
-        raise HTTPException(status_code=400, detail="Failed to create session")
+        raise HTTPException(status_code=400, detail=f"Failed to duplicate session: {str(e)}")
+
+def _discard_session(session_id: int, user_id: str):
+    """Best-effort delete of a session created by a write that then failed"""
+    try:
+        supabase.table("workout_sessions").delete().eq("id", session_id).eq("user_id", user_id).execute()
+    except Exception:
+        logger.warning("Could not remove session left by a failed duplicate", exc_info=True, extra={"session_id": session_id})
 
 def add_set_to_session(session_id: int, exercise_name: str, reps: int, weight: int, is_kg: bool, user_id: str, access_token: str):
     try:
@@ -67,9 +218,7 @@ def add_set_to_session(session_id: int, exercise_name: str, reps: int, weight: i
             
         authenticate_user(user_id, access_token)
         
-        # Get exercise ID, fallback to exercise name if not found
-        exercise_result = supabase.table("dim_exercises").select("id").eq("exercise", exercise_name).execute()
-        exercise_id = exercise_result.data[0]["id"] if exercise_result.data else exercise_name
+        exercise_id = resolve_exercise_id(exercise_name)
         
         result = supabase.table("session_sets").insert({
             "session_id": session_id,
@@ -81,6 +230,10 @@ def add_set_to_session(session_id: int, exercise_name: str, reps: int, weight: i
         }).execute()
         
         if result.data:
+            last_performance.record(result.data[0])
+            exercise_stats.record(user_id, exercise_id, result.data[0].get("created_at"), exercise_name)
+            event_hub.publish(user_id, "set.added", {**result.data[0], "exercise_name": exercise_name})
+            dirty_users.mark(user_id, access_token)
             return {"success": True, "data": result.data[0]}
         else:
             raise HTTPException(status_code=400, detail="Failed to add set")
@@ -100,7 +253,7 @@ def get_current_session(user_id: str, access_token: str):
         
         if result.data:
             session = result.data[0]
-            sets_result = supabase.table("session_sets").select("*").eq("session_id", session["id"]).order("created_at").execute()
+            sets_result = supabase.table("session_sets").select("*").eq("session_id", session["id"]).order("created_at").order("id").execute()
             
             # Enrich sets with exercise names
             enriched_sets = []
@@ -110,8 +263,8 @@ def get_current_session(user_id: str, access_token: str):
                     exercise_result = supabase.table("dim_exercises").select("exercise").eq("id", set_data["exercise_id"]).execute()
                     if exercise_result.data:
                         exercise_name = exercise_result.data[0]["exercise"]
-                except:
-                    pass
+                except Exception:
+                    logger.warning("Exercise name lookup failed", exc_info=True, extra={"exercise_id": set_data["exercise_id"]})
                 
                 enriched_sets.append({**set_data, "exercise_name": exercise_name})
             
@@ -121,20 +274,21 @@ def get_current_session(user_id: str, access_token: str):
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Failed to get session: {str(e)}")
 
-def get_sessions_by_date(user_id: str, access_token: str, date: str):
+def get_sessions_by_date(user_id: str, access_token: str, date: str, tz: str = "UTC"):
     try:
+        zone = _zone(tz)
+        
         # Test mode - return mock data
         if user_id == "123e4567-e89b-12d3-a456-426614174000" and access_token == "test-token-456":
             return {"success": True, "data": []}
             
         authenticate_user(user_id, access_token)
         
-        # Parse date and create date range for the day
+        # The day in the user's timezone, same window as the calendar uses
         target_date = datetime.fromisoformat(date.replace('Z', '+00:00')).date()
-        start_of_day = datetime.combine(target_date, datetime.min.time())
-        end_of_day = datetime.combine(target_date, datetime.max.time())
+        start_of_day, end_of_day = _local_day_range(target_date, target_date, zone)
         
-        result = supabase.table("workout_sessions").select("*").eq("user_id", user_id).gte("created_at", start_of_day.isoformat()).lte("created_at", end_of_day.isoformat()).order("created_at", desc=True).execute()
+        result = supabase.table("workout_sessions").select("*").eq("user_id", user_id).gte("created_at", start_of_day.isoformat()).lt("created_at", end_of_day.isoformat()).order("created_at", desc=True).execute()
         
         if not result.data:
             return {"success": True, "data": []}
@@ -148,33 +302,147 @@ def get_sessions_by_date(user_id: str, access_token: str, date: str):
                 enriched_sessions.append({**session, "set_count": set_count})
             except Exception:
                 # If there's an error getting set count, just set it to 0
+                logger.warning("Set count lookup failed", exc_info=True, extra={"session_id": session["id"]})
                 enriched_sessions.append({**session, "set_count": 0})
         
         return {"success": True, "data": enriched_sessions}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Failed to get sessions: {str(e)}")
 
-def rename_workout_session(session_id: int, name: str, user_id: str, access_token: str):
+def get_calendar(user_id: str, access_token: str, start_date: str, end_date: str, tz: str = "UTC"):
+    """Per-day session count, set count and volume (kg) for every day in [start_date, end_date] in the user's timezone"""
     try:
+        zone = _zone(tz)
+        
+        first_day = datetime.fromisoformat(start_date).date()
+        last_day = datetime.fromisoformat(end_date).date()
+        day_count = (last_day - first_day).days + 1
+        if day_count < 1 or day_count > MAX_CALENDAR_DAYS:
+            raise HTTPException(status_code=400, detail=f"Date range must be between 1 and {MAX_CALENDAR_DAYS} days")
+        
+        days = {
+            (first_day + timedelta(days=offset)).isoformat(): {"session_count": 0, "set_count": 0, "volume": 0.0}
+            for offset in range(day_count)
+        }
+        
+        # Test mode - return empty days
+        if ENABLE_TEST_MODE and user_id == TEST_USER_ID and access_token == TEST_ACCESS_TOKEN:
+            return {"success": True, "data": [{"date": day, **totals} for day, totals in days.items()]}
+        
         authenticate_user(user_id, access_token)
         
-        # First check if the session exists
-        check_result = supabase.table("workout_sessions").select("*").eq("id", session_id).eq("user_id", user_id).execute()
-        if not check_result.data:
-            raise HTTPException(status_code=404, detail="Session not found")
+        range_start, range_end = _local_day_range(first_day, last_day, zone)
+        
+        # One query - sessions in range with their sets embedded
+        result = supabase.table("workout_sessions").select("id, created_at, session_sets(reps, weight, is_kg)").eq("user_id", user_id).gte("created_at", range_start.isoformat()).lt("created_at", range_end.isoformat()).execute()
+        
+        for session in result.data or []:
+            created_at = datetime.fromisoformat(session["created_at"].replace('Z', '+00:00'))
+            if created_at.tzinfo is None:
+                created_at = created_at.replace(tzinfo=timezone.utc)
+            totals = days.get(created_at.astimezone(zone).date().isoformat())
+            if totals is None:
+                continue
+            
+            sets = session.get("session_sets") or []
+            totals["session_count"] += 1
+            totals["set_count"] += len(sets)
+            totals["volume"] += _volume(sets)
+        
+        return {"success": True, "data": [{"date": day, **totals, "volume": round(totals["volume"], 1)} for day, totals in days.items()]}
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Failed to get calendar: {str(e)}")
+
+def _volume(sets) -> float:
+    """Total reps x weight in kg"""
+    return sum(set_data["reps"] * set_data["weight"] * (1 if set_data["is_kg"] else LB_TO_KG) for set_data in sets)
+
+def compute_weekly_summary(user_id: str, access_token: str):
+    """Recompute and store a user's weekly volume, session frequency and streak (UTC, Monday weeks)"""
+    authenticate_user(user_id, access_token)
+    
+    today = datetime.now(timezone.utc).date()
+    this_week = week_start(today)
+    first_week = this_week - timedelta(weeks=SUMMARY_WEEKS - 1)
+    weeks = {
+        (first_week + timedelta(weeks=offset)).isoformat(): {"session_count": 0, "set_count": 0, "volume": 0.0}
+        for offset in range(SUMMARY_WEEKS)
+    }
+    
+    # One query - sessions in the window with their sets embedded
+    range_start = datetime.combine(first_week, datetime.min.time(), tzinfo=timezone.utc)
+    result = supabase.table("workout_sessions").select("created_at, session_sets(reps, weight, is_kg)").eq("user_id", user_id).gte("created_at", range_start.isoformat()).execute()
+    
+    for session in result.data or []:
+        created_at = datetime.fromisoformat(session["created_at"].replace('Z', '+00:00'))
+        if created_at.tzinfo is None:
+            created_at = created_at.replace(tzinfo=timezone.utc)
+        day = created_at.astimezone(timezone.utc).date()
+        totals = weeks.get((day - timedelta(days=day.weekday())).isoformat())
+        if totals is None:
+            continue
+        
+        sets = session.get("session_sets") or []
+        totals["session_count"] += 1
+        totals["set_count"] += len(sets)
+        totals["volume"] += _volume(sets)
+    
+    # Streak of consecutive weeks with a workout, allowing the current week to still be empty
+    week_list = [{"week_start": week, **totals, "volume": round(totals["volume"], 1)} for week, totals in weeks.items()]
+    streak = 0
+    for index, week in enumerate(reversed(week_list)):
+        if week["session_count"] > 0:
+            streak += 1
+        elif index > 0:
+            break
+    
+    summary = {"weeks": week_list, "streak_weeks": streak, "computed_at": datetime.now(timezone.utc).isoformat()}
+    weekly_summaries.put(user_id, summary)
+    return summary
+
+def get_weekly_summary(user_id: str, access_token: str):
+    try:
+        # Test mode - return mock data
+        if ENABLE_TEST_MODE and user_id == TEST_USER_ID and access_token == TEST_ACCESS_TOKEN:
+            return {"success": True, "data": {"weeks": [], "streak_weeks": 0, "computed_at": None}}
+            
+        verify_user(user_id, access_token)
         
-        result = supabase.table("workout_sessions").update({
-            "name": name
-        }).eq("id", session_id).eq("user_id", user_id).execute()
+        # Precomputed by the background job - computed inline after a restart, an eviction or a new week
+        summary = weekly_summaries.get(user_id)
+        if summary is None:
+            summary = compute_weekly_summary(user_id, access_token)
+        
+        return {"success": True, "data": summary}
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Failed to get weekly summary: {str(e)}")
+
+def rename_workout_session(session_id: int, name: str, user_id: str, access_token: str, expected_updated_at: Optional[str] = None):
+    try:
+        authenticate_user(user_id, access_token)
+        
+        # One conditional update - the neq filter makes an unchanged name return no rows
+        result = _conditional_update(
+            "workout_sessions", {"name": name}, expected_updated_at,
+            lambda query: query.eq("id", session_id).eq("user_id", user_id).neq("name", name)
+        )
         
         if result.data:
-            return {"success": True, "data": result.data[0]}
-        else:
-            raise HTTPException(status_code=400, detail="Failed to rename session - no data returned")
+            event_hub.publish(user_id, "session.updated", result.data[0])
+            return {"success": True, "data": result.data[0], "changed": True}
+        
+        current = _explain_missed_write("workout_sessions", session_id, user_id, expected_updated_at, "Session not found")
+        return {"success": True, "data": current, "changed": False}
     except HTTPException:
         raise
     except Exception as e:
-        print(f"Rename session error: {str(e)}")  # Debug logging
+        logger.exception("Rename session failed", extra={"session_id": session_id})
         raise HTTPException(status_code=400, detail=f"Failed to rename session: {str(e)}")
 
 def get_all_sessions(user_id: str, access_token: str):
@@ -195,6 +463,7 @@ def get_all_sessions(user_id: str, access_token: str):
                 enriched_sessions.append({**session, "set_count": set_count})
             except Exception:
                 # If there's an error getting set count, just set it to 0
+                logger.warning("Set count lookup failed", exc_info=True, extra={"session_id": session["id"]})
                 enriched_sessions.append({**session, "set_count": 0})
         
         return {"success": True, "data": enriched_sessions}
@@ -205,70 +474,156 @@ def duplicate_set(set_id: int, user_id: str, access_token: str):
     try:
         authenticate_user(user_id, access_token)
         
-        # Get the original set
-        original_set = supabase.table("session_sets").select("*").eq("id", set_id).eq("user_id", user_id).execute()
-        if not original_set.data:
+        # Copy the set server-side in one INSERT ... SELECT
+        try:
+            result = supabase.rpc('duplicate_session_set', {
+                'source_set_id': set_id,
+                'owner_id': user_id
+            }).execute()
+            new_rows = result.data
+        except APIError as e:
+            # Fall back to read + insert only if the function isn't installed. Anything else
+            # (a timeout in particular) may have committed the copy, and inserts are not retried.
+            if not _function_missing(e):
+                raise
+            logger.debug("duplicate_session_set RPC not installed, using fallback", exc_info=True)
+            new_rows = _duplicate_set_fallback(set_id, user_id)
+        
+        if not new_rows:
             raise HTTPException(status_code=404, detail="Set not found")
         
-        set_data = original_set.data[0]
-        
-        # Create a new set with the same data
-        new_set = supabase.table("session_sets").insert({
-            "session_id": set_data["session_id"],
-            "exercise_id": set_data["exercise_id"],
-            "reps": set_data["reps"],
-            "weight": set_data["weight"],
-            "is_kg": set_data["is_kg"],
-            "user_id": user_id
-        }).execute()
-        
-        if new_set.data:
-            return {"success": True, "data": new_set.data[0]}
-        else:
-            raise HTTPException(status_code=400, detail="Failed to duplicate set")
+        new_set = new_rows[0]
+        last_performance.record(new_set)
+        exercise_stats.record(user_id, new_set["exercise_id"], new_set.get("created_at"))
+        event_hub.publish(user_id, "set.added", new_set)
+        dirty_users.mark(user_id, access_token)
+        return {"success": True, "data": new_set}
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Failed to duplicate set: {str(e)}")
 
-def edit_set(set_id: int, reps: int, weight: int, user_id: str, access_token: str):
+def _function_missing(error: APIError) -> bool:
+    """True if PostgREST could not find the called function (PGRST202, or a bare 404)"""
+    return str(error.code) in ("PGRST202", "404")
+
+def _duplicate_set_fallback(set_id: int, user_id: str):
+    """Two round trip duplicate used when duplicate_session_set isn't installed"""
+    original_set = supabase.table("session_sets").select("*").eq("id", set_id).eq("user_id", user_id).execute()
+    if not original_set.data:
+        return []
+    
+    set_data = original_set.data[0]
+    
+    # Create a new set with the same data
+    new_set = supabase.table("session_sets").insert({
+        "session_id": set_data["session_id"],
+        "exercise_id": set_data["exercise_id"],
+        "reps": set_data["reps"],
+        "weight": set_data["weight"],
+        "is_kg": set_data["is_kg"],
+        "user_id": user_id
+    }).execute()
+    
+    if not new_set.data:
+        raise HTTPException(status_code=400, detail="Failed to duplicate set")
+    return new_set.data
+
+def edit_set(set_id: int, reps: int, weight: int, user_id: str, access_token: str, expected_updated_at: Optional[str] = None):
     try:
         authenticate_user(user_id, access_token)
         
-        # Update the set
-        result = supabase.table("session_sets").update({
-            "reps": reps,
-            "weight": weight
-        }).eq("id", set_id).eq("user_id", user_id).execute()
+        # One conditional update - identical reps and weight match no rows
+        result = _conditional_update(
+            "session_sets", {"reps": reps, "weight": weight}, expected_updated_at,
+            lambda query: query.eq("id", set_id).eq("user_id", user_id).or_(f"reps.neq.{reps},weight.neq.{weight}")
+        )
         
         if result.data:
-            return {"success": True, "data": result.data[0]}
-        else:
-            raise HTTPException(status_code=404, detail="Set not found or not authorized to edit")
+            last_performance.update(result.data[0])
+            event_hub.publish(user_id, "set.updated", result.data[0])
+            dirty_users.mark(user_id, access_token)
+            return {"success": True, "data": result.data[0], "changed": True}
+        
+        current = _explain_missed_write("session_sets", set_id, user_id, expected_updated_at, "Set not found or not authorized to edit")
+        return {"success": True, "data": current, "changed": False}
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Failed to edit set: {str(e)}")
 
-def remove_set(set_id: int, user_id: str, access_token: str):
+def remove_set(set_id: int, user_id: str, access_token: str, expected_updated_at: Optional[str] = None):
     try:
         authenticate_user(user_id, access_token)
         
-        # First, let's check if the set exists
-        check_result = supabase.table("session_sets").select("*").eq("id", set_id).eq("user_id", user_id).execute()
+        # One conditional delete returning the removed row
+        query = supabase.table("session_sets").delete().eq("id", set_id).eq("user_id", user_id)
+        if expected_updated_at and _has_updated_at is not False:
+            query = query.eq("updated_at", expected_updated_at)
+        result = query.execute()
         
-        if not check_result.data:
+        if not result.data:
+            if expected_updated_at:
+                _explain_missed_write("session_sets", set_id, user_id, expected_updated_at, "Set not found or not authorized")
             raise HTTPException(status_code=404, detail="Set not found or not authorized")
         
-        # Delete the set
-        result = supabase.table("session_sets").delete().eq("id", set_id).eq("user_id", user_id).execute()
-        
-        return {"success": True, "message": "Set removed successfully"}
+        last_performance.discard(set_id)
+        event_hub.publish(user_id, "set.removed", result.data[0])
+        dirty_users.mark(user_id, access_token)
+        return {"success": True, "message": "Set removed successfully", "data": result.data[0]}
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Failed to remove set: {str(e)}")
 
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+def _conditional_update(table: str, values: dict, expected_updated_at: Optional[str], apply_filters):
+    """UPDATE stamped with updated_at and conditioned on expected_updated_at.
+    
+    Databases without migrations/001_updated_at_and_duplicate_set.sql have no updated_at
+    column - the write is then retried unstamped and without the concurrency check.
+    """
+    global _has_updated_at
+    if _has_updated_at is not False:
+        query = apply_filters(supabase.table(table).update({**values, "updated_at": _now()}))
+        if expected_updated_at:
+            query = query.eq("updated_at", expected_updated_at)
+        try:
+            result = query.execute()
+            _has_updated_at = True
+            return result
+        except Exception as e:
+            if "updated_at" not in str(e):
+                raise
+            logger.warning("updated_at column missing - writes skip the concurrency check until migrations are applied", extra={"table": table})
+            _has_updated_at = False
+    return apply_filters(supabase.table(table).update(values)).execute()
+
+def _explain_missed_write(table: str, record_id: int, user_id: str, expected_updated_at: Optional[str], not_found_detail: str):
+    """Work out why a conditional write matched no rows - only runs off the happy path.
+    
+    Raises 404 if the row doesn't exist and 409 if it was modified since expected_updated_at,
+    otherwise returns the current row (the write would not have changed anything).
+    """
+    current = supabase.table(table).select("*").eq("id", record_id).eq("user_id", user_id).execute()
+    if not current.data:
+        raise HTTPException(status_code=404, detail=not_found_detail)
+    
+    row = current.data[0]
+    if expected_updated_at and "updated_at" in row and not _same_instant(row["updated_at"], expected_updated_at):
+        raise HTTPException(status_code=409, detail="Modified on another device - reload and try again")
+    return row
+
+def _same_instant(first: Optional[str], second: Optional[str]) -> bool:
+    if not first or not second:
+        return first == second
+    try:
+        return datetime.fromisoformat(first.replace('Z', '+00:00')) == datetime.fromisoformat(second.replace('Z', '+00:00'))
+    except ValueError:
+        return first == second
+
 def get_session_sets(session_id: int, user_id: str, access_token: str):
     try:
         # Test mode - return mock data
@@ -286,7 +641,7 @@ def get_session_sets(session_id: int, user_id: str, access_token: str):
         session = session_result.data[0]
         
         # Get sets for this session
-        sets_result = supabase.table("session_sets").select("*").eq("session_id", session_id).order("created_at").execute()
+        sets_result = supabase.table("session_sets").select("*").eq("session_id", session_id).order("created_at").order("id").execute()
         
         # Enrich sets with exercise names
         enriched_sets = []
@@ -296,11 +651,34 @@ def get_session_sets(session_id: int, user_id: str, access_token: str):
                 exercise_result = supabase.table("dim_exercises").select("exercise").eq("id", set_data["exercise_id"]).execute()
                 if exercise_result.data:
                     exercise_name = exercise_result.data[0]["exercise"]
-            except:
-                pass
+            except Exception:
+                logger.warning("Exercise name lookup failed", exc_info=True, extra={"exercise_id": set_data["exercise_id"]})
             
             enriched_sets.append({**set_data, "exercise_name": exercise_name})
         
         return {"success": True, "data": enriched_sets}
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Failed to get session sets: {str(e)}")
+
+def get_last_performance(exercise_name: str, user_id: str, access_token: str):
+    """Most recent sets the user logged for an exercise, newest first"""
+    try:
+        # Test mode - return mock data
+        if ENABLE_TEST_MODE and user_id == TEST_USER_ID and access_token == TEST_ACCESS_TOKEN:
+            return {"success": True, "data": []}
+            
+        verify_user(user_id, access_token)
+        
+        exercise_id = resolve_exercise_id(exercise_name)
+        sets = last_performance.get(user_id, exercise_id)
+        if sets is None:
+            # First lookup for this user and exercise - seed the index
+            result = supabase.table("session_sets").select("id, session_id, exercise_id, reps, weight, is_kg, created_at").eq("user_id", user_id).eq("exercise_id", exercise_id).order("created_at", desc=True).limit(LAST_PERFORMANCE_SETS).execute()
+            last_performance.load(user_id, exercise_id, result.data or [])
+            sets = last_performance.get(user_id, exercise_id)
+        
+        return {"success": True, "data": [{**set_data, "exercise_name": exercise_name} for set_data in sets]}
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Failed to get last performance: {str(e)}")